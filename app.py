@@ -1,20 +1,48 @@
-import io
 import os
 import re
+import hmac
 import json
+import base64
+import shutil
+import hashlib
+import tempfile
+import threading
+import unicodedata
+import time
+import sqlite3
 import subprocess
-from flask import Flask, request, jsonify, Response, send_from_directory, send_file
-from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity, verify_jwt_in_request
+import multiprocessing
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import wraps
+from flask import Flask, request, jsonify, Response, send_from_directory, send_file, g, has_request_context
+from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt, get_jwt_identity, verify_jwt_in_request
 from flask_pymongo import PyMongo
+from pymongo import ReturnDocument
 from flask_cors import CORS
 from datetime import timedelta, datetime
 from dotenv import load_dotenv
 from werkzeug.security import generate_password_hash, check_password_hash
 from glob import glob
+from urllib.parse import quote
+from bisect import bisect_left, bisect_right
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES
 import logging
 from logging.handlers import RotatingFileHandler
-from PIL import Image
+from fs_index import ImageIndex, IndexNotReady
+from log_reader import read_paginated_logs, read_filtered_logs, LEVELS
+from imaging import (write_atomic, resize_image_atomic, render_thumbnail, render_variants, render_sprite_sheet,
+                     ImageDecodeError, THUMBNAIL_SIZE, PREVIEW_SIZE, PYRAMID_SIZES, FILE_MODE)
+from streaming import stream_zip, stream_multipart
+from events import EventBroker, KEEPALIVE, format_event
+from health_store import HealthStore, RESOLUTIONS as HEALTH_RESOLUTIONS, default_resolution
+from metrics import (render_metrics, CONTENT_TYPE, HTTP_REQUEST_SECONDS, JOB_SECONDS, JOB_OVERRUNS,
+                     JOB_RUNNING, SITE_JOB_SECONDS, IMAGE_SECONDS, MONGO_SECONDS, FS_SCAN_SECONDS,
+                     SSE_SUBSCRIBERS, SSE_EVENTS)
 
 load_dotenv()
 
@@ -23,7 +51,29 @@ app = Flask(__name__)
 # log/ 디렉토리 생성
 os.makedirs('log', exist_ok=True)
 
-log_format = logging.Formatter('%(asctime)s %(levelname)s: %(message)s')
+
+# JSON lines 로그: 메시지 외에 extra 로 넘긴 event, site, username, duration 필드를 함께 기록
+class JsonLogFormatter(logging.Formatter):
+    FIELDS = ('event', 'site', 'username', 'duration')
+
+    def format(self, record):
+        entry = {'time': self.formatTime(record),
+                 'level': record.levelname,
+                 'message': record.getMessage()}
+        for field in self.FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+# LOG_FORMAT=json 이면 log/*.log 를 JSON lines 로 기록 (기본: text)
+if os.getenv('LOG_FORMAT', 'text').lower() == 'json':
+    log_format = JsonLogFormatter()
+else:
+    log_format = logging.Formatter('%(asctime)s %(levelname)s: %(message)s')
 
 
 # DEBUG 레벨만 통과시키는 필터
@@ -54,7 +104,8 @@ app.logger.setLevel(logging.DEBUG)
 
 # CORS setting
 CORS(app, resources={
-     r"/*": {"origins": [os.getenv('FRONT_DEV'), os.getenv('FRONT_PRD')]}})
+     r"/*": {"origins": [os.getenv('FRONT_DEV'), os.getenv('FRONT_PRD')],
+             "expose_headers": ['X-Information-Version']}})
 
 
 app.config['MONGO_URI'] = os.getenv('MONGO_URI')
@@ -72,23 +123,295 @@ apscheduler_logger = logging.getLogger('apscheduler')
 apscheduler_logger.addHandler(info_log_handler)
 apscheduler_logger.setLevel(logging.WARNING)
 
-scheduler.start()
 
+# 요청 처리 시간 기록 (route 는 URL 규칙, 예: /images/<site>/recent)
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_duration(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                     route=request.url_rule.rule if request.url_rule else 'unmatched',
+                                     method=request.method,
+                                     status=response.status_code)
+    return response
+
+
+# 실행 중인 scheduler 작업 수: job -> count
+job_running_lock = threading.Lock()
+job_running = {}
+
+
+def timed_job(interval_seconds):
+    """
+    scheduler 작업의 실행 시간을 기록합니다.
+    주기보다 오래 걸리거나 이전 실행이 끝나기 전에 시작되면 overrun 으로 셉니다.
+    """
+    def decorator(func):
+        job = func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with job_running_lock:
+                if job_running.get(job):
+                    JOB_OVERRUNS.inc(job=job, reason='overlap')
+                job_running[job] = job_running.get(job, 0) + 1
+                JOB_RUNNING.set(job_running[job], job=job)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                duration = time.perf_counter() - started
+                JOB_SECONDS.observe(duration, job=job)
+                if duration > interval_seconds:
+                    JOB_OVERRUNS.inc(job=job, reason='interval')
+                with job_running_lock:
+                    job_running[job] -= 1
+                    JOB_RUNNING.set(job_running[job], job=job)
+        return wrapper
+    return decorator
 
-def list_photo_filenames(directory):
-    photo_filenames = []
 
-    for entry in os.listdir(directory):
-        entry_path = os.path.join(directory, entry)
-        if not os.path.isfile(entry_path):
-            continue
+# max_instances 에 걸려 건너뛰거나 misfire_grace_time 을 넘겨 놓친 실행도 overrun 으로 기록
+def count_skipped_job(event):
+    JOB_OVERRUNS.inc(job=event.job_id,
+                     reason='missed' if event.code == EVENT_JOB_MISSED else 'max_instances')
+
+
+scheduler.add_listener(count_skipped_job, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+
+# spawn / forkserver 로 시작한 process pool worker 는 `python app.py` 로 실행 중인 __main__ 을
+# __mp_main__ 으로 다시 import 합니다. 그때는 scheduler 와 인덱스 scan 을 시작하지 않습니다.
+IS_POOL_WORKER = __name__ == '__mp_main__'
+if not IS_POOL_WORKER:
+    scheduler.start()
+
+# IMAGES 트리의 메모리 인덱스 (sites -> dates -> 정렬된 사진 목록)
+IMAGE_INDEX_RESCAN_SECONDS = int(os.getenv('IMAGE_INDEX_RESCAN_SECONDS', 60))
+# 첫 full scan 이 끝나기 전의 요청은 이 시간만 기다리고 503 을 반환합니다.
+IMAGE_INDEX_READY_TIMEOUT = float(os.getenv('IMAGE_INDEX_READY_TIMEOUT', 10))
+image_index = ImageIndex(os.getenv('IMAGES'), ready_timeout=IMAGE_INDEX_READY_TIMEOUT)
 
-        if os.path.splitext(entry)[1].lower() not in {'.jpg', '.jpeg'}:
-            continue
 
-        photo_filenames.append(entry)
+@app.errorhandler(IndexNotReady)
+def index_not_ready(e):
+    return jsonify({'message': 'Image index is loading, try again shortly.'}), 503, {'Retry-After': '10'}
 
-    return sorted(photo_filenames)
+
+# 사이트 event (SSE): 새 사진 (frame), making_setting_json 에서 바뀐 사이트 정보 (status)
+SSE_KEEPALIVE_SECONDS = int(os.getenv('SSE_KEEPALIVE_SECONDS', 15))
+SSE_RETRY_MS = int(os.getenv('SSE_RETRY_MS', 5000))
+event_broker = EventBroker(capacity=int(os.getenv('SSE_BUFFER_EVENTS', 1024)),
+                           max_subscribers=int(os.getenv('SSE_MAX_SUBSCRIBERS', 500)))
+
+
+def publish_site_event(event, site, data):
+    event_broker.publish(event, site, dict(data, site=site))
+    SSE_EVENTS.inc(event=event)
+
+
+def publish_new_photos(site, date, new_photos, photos):
+    publish_site_event('frame', site, {'date': date, 'photo': new_photos[-1],
+                                       'new': len(new_photos), 'count': len(photos)})
+
+
+image_index.add_listener(publish_new_photos)
+if not IS_POOL_WORKER:
+    image_index.start()
+
+
+@scheduler.scheduled_job('interval',
+                         id='rescan_image_index',
+                         seconds=IMAGE_INDEX_RESCAN_SECONDS,
+                         misfire_grace_time=10,
+                         max_instances=1)
+def rescan_image_index():
+    # inotify 이벤트를 놓치는 경우(네트워크 스토리지 등)를 위한 주기적 rescan
+    image_index.rescan()
+
+
+@scheduler.scheduled_job('cron',
+                         id='full_rescan_image_index',
+                         hour='*',
+                         minute='5',
+                         misfire_grace_time=60,
+                         max_instances=1)
+def full_rescan_image_index():
+    image_index.rescan(full=True)
+
+
+# indexed_jpgs 결과 캐시: (site, date) -> (인덱스의 사진 tuple, *.jpg tuple)
+indexed_jpgs_cache = {}
+
+
+def indexed_jpgs(site, date):
+    """인덱스에서 site/date 폴더의 *.jpg 파일 이름 목록 (오름차순)."""
+    photos = image_index.photos(site, date) or ()
+    cached = indexed_jpgs_cache.get((site, date))
+    if cached and cached[0] is photos:
+        return cached[1]
+    jpgs = tuple(photo for photo in photos if photo.endswith('.jpg'))
+    indexed_jpgs_cache[(site, date)] = (photos, jpgs)
+    return jpgs
+
+
+# 사이트별 마지막 처리 이미지 인덱스 (site -> source, mtime, hash)
+THUMBNAIL_INDEX_PATH = 'thumbnails.json'
+NO_IMAGE_TODAY_PATH = os.path.join('static', 'no_image_today.jpg')
+
+# /images/<site>/recent 미리보기 캐시 (cache/previews/<site>/<key>.jpg)
+PREVIEW_CACHE_DIR = os.path.abspath(os.path.join('cache', 'previews'))
+
+# 크기별 사진 사본 캐시 (cache/pyramid/<site>/<date>/<photo>_<size>.jpg)
+PYRAMID_CACHE_DIR = os.path.abspath(os.getenv('PYRAMID_CACHE_DIR', os.path.join('cache', 'pyramid')))
+PYRAMID_SCAN_SECONDS = int(os.getenv('PYRAMID_SCAN_SECONDS', 300))
+# 한 번 실행에서 만들 최대 프레임 수 (배포 직후처럼 밀린 프레임이 많으면 다음 실행에서 이어서 만듭니다)
+PYRAMID_MAX_PER_RUN = int(os.getenv('PYRAMID_MAX_PER_RUN', 500))
+# 이 일수 동안 만들어지거나 읽히지 않은 사본은 지웁니다 (요청이 오면 다시 만듭니다)
+PYRAMID_RETENTION_DAYS = int(os.getenv('PYRAMID_RETENTION_DAYS', 7))
+
+# 하루 사진의 sprite sheet 캐시 (cache/sprites/<site>/<date>.json, <date>_<sheet>.jpg)
+SPRITE_CACHE_DIR = os.path.abspath(os.getenv('SPRITE_CACHE_DIR', os.path.join('cache', 'sprites')))
+SPRITE_COLUMNS = 10
+# sheet 하나에 넣는 사진 수: 10분 간격 촬영 하루치(144장)가 sheet 하나에 들어갑니다.
+SPRITE_SHEET_FRAMES = int(os.getenv('SPRITE_SHEET_FRAMES', 150))
+
+# 사이트별 병렬 처리 worker 수 (이미지 작업: process, 디렉토리 스캔: thread)
+THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', os.cpu_count() or 1))
+SCAN_WORKERS = int(os.getenv('SCAN_WORKERS', 8))
+# process pool 시작 방식. 플랫폼 기본값(fork / spawn / forkserver)에 따라 동작이 달라지지 않도록 명시합니다.
+# fork 는 scheduler / inotify thread 가 도는 프로세스를 복제하므로 기본은 spawn 입니다.
+PROCESS_START_METHOD = os.getenv('PROCESS_START_METHOD', 'spawn')
+
+
+def write_json_atomic(path, data):
+    """임시 파일에 쓴 뒤 rename 하여 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 합니다."""
+    # 직렬화에 실패하면 임시 파일을 만들기 전에 예외가 납니다.
+    content = json.dumps(data, indent=4).encode()
+    write_atomic(path, lambda f: f.write(content))
+
+
+def load_thumbnail_index():
+    if not os.path.exists(THUMBNAIL_INDEX_PATH):
+        return {}
+    try:
+        with open(THUMBNAIL_INDEX_PATH, 'r') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        app.logger.error(f'Failed to load {THUMBNAIL_INDEX_PATH}: {e}')
+        return {}
+
+
+def file_md5(path):
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def link_placeholder_thumbnail(thumbnail_path):
+    # 같은 파일을 다시 인코딩하지 않고 hard link 로 연결 (실패하면 복사)
+    tmp_path = f'{thumbnail_path}.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(NO_IMAGE_TODAY_PATH, tmp_path)
+    except OSError:
+        shutil.copyfile(NO_IMAGE_TODAY_PATH, tmp_path)
+    os.replace(tmp_path, thumbnail_path)
+
+
+def observe_resize(kind, timings):
+    decode_seconds, encode_seconds = timings
+    IMAGE_SECONDS.observe(decode_seconds, kind=kind, phase='decode')
+    IMAGE_SECONDS.observe(encode_seconds, kind=kind, phase='encode')
+
+
+def preview_cache_path(site, source_path, mtime):
+    """원본 경로 + mtime 으로 만든 key 와 미리보기 캐시 경로를 반환합니다."""
+    key = hashlib.md5(f'{source_path}:{mtime}'.encode()).hexdigest()
+    return os.path.join(PREVIEW_CACHE_DIR, site, f'{key}.jpg'), key
+
+
+def remove_stale_previews(site, preview_path):
+    """같은 사이트의 preview_path 가 아닌 이전 미리보기를 지웁니다."""
+    for stale_path in glob(os.path.join(PREVIEW_CACHE_DIR, site, '*.jpg')):
+        if stale_path != preview_path:
+            try:
+                os.remove(stale_path)
+            except FileNotFoundError:
+                pass
+
+
+def ensure_preview(site, source_path):
+    """
+    source_path 의 1200x1000 미리보기를 캐시에 만들고 (path, key, mtime) 을 반환합니다.
+    이미 있으면 다시 만들지 않고, 같은 사이트의 이전 미리보기는 지웁니다.
+    """
+    mtime = os.path.getmtime(source_path)
+    preview_path, key = preview_cache_path(site, source_path, mtime)
+    if not os.path.exists(preview_path):
+        os.makedirs(os.path.dirname(preview_path), exist_ok=True)
+        observe_resize('preview', resize_image_atomic(source_path, preview_path, PREVIEW_SIZE))
+        remove_stale_previews(site, preview_path)
+    return preview_path, key, mtime
+
+
+def scan_site_thumbnail(folder_name, today):
+    """오늘 폴더의 최신 이미지를 찾습니다. setting 폴더가 없으면 None."""
+    if not image_index.has_setting(folder_name):
+        return None
+
+    image_files = indexed_jpgs(folder_name, today)
+    if not image_files:
+        return {'site': folder_name, 'source': None, 'mtime': None}
+
+    latest_image_file = os.path.join(os.getenv("IMAGES"), folder_name, today, image_files[-1])
+    try:
+        latest_mtime = os.path.getmtime(latest_image_file)
+    except FileNotFoundError:
+        # 인덱스 갱신 전에 지워진 경우: 다음 주기에 다시 처리
+        return {'site': folder_name, 'source': None, 'mtime': None}
+    return {'site': folder_name,
+            'source': latest_image_file,
+            'mtime': latest_mtime}
+
+
+def timed_site_scan(job, func, site, *args):
+    """사이트 하나의 스캔 시간을 fs scan histogram 과 사이트별 gauge 에 기록합니다."""
+    started = time.perf_counter()
+    try:
+        return func(site, *args)
+    finally:
+        duration = time.perf_counter() - started
+        FS_SCAN_SECONDS.observe(duration, scan=job)
+        SITE_JOB_SECONDS.set(duration, job=job, site=os.path.basename(site))
+
+
+def run_in_threads(func, items):
+    """디렉토리 스캔처럼 I/O 위주인 작업을 thread pool 로 나눠 실행합니다."""
+    if SCAN_WORKERS <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        return list(executor.map(func, items))
+
+
+def run_in_processes(func, *iterables):
+    """
+    PIL 디코딩처럼 CPU 위주인 작업을 process pool 로 나눠 실행합니다.
+    func 는 app.py 를 import 하지 않는 모듈(imaging)의 함수여야 합니다.
+    """
+    items = list(zip(*iterables))
+    if THUMBNAIL_WORKERS <= 1 or len(items) <= 1:
+        return [func(*item) for item in items]
+    with ProcessPoolExecutor(max_workers=min(THUMBNAIL_WORKERS, len(items)),
+                             mp_context=multiprocessing.get_context(PROCESS_START_METHOD)) as executor:
+        return list(executor.map(func, *zip(*items)))
 
 
 @scheduler.scheduled_job('cron',
@@ -97,21 +420,27 @@ def list_photo_filenames(directory):
                          minute='*/10',
                          misfire_grace_time=10,
                          max_instances=3)
+@timed_job(600)
 def making_thumbnails():
+    started = time.monotonic()
     # Generate today's date string
     today = datetime.now().strftime('%Y-%m-%d')
 
-    # Get all subfolders in the static directory
-    subfolders = [f for f in glob(
-        f'{os.getenv("IMAGES")}/*') if os.path.isdir(f)]
+    # Get all site folders from the image index
+    subfolders = [os.path.join(os.getenv("IMAGES"), site) for site in image_index.sites()]
 
     # Get a list of existing thumbnail files
     existing_thumbnails = [f for f in glob('static/thumb_*.jpg')]
 
+    # Load the index of the last processed image per site
+    thumbnail_index = load_thumbnail_index()
+
     # Make report list
     remove_site = []
     no_photo_yet_site = []
     thumbnail_made_site = []
+    unchanged_site = []
+    failed_site = []
 
     # Remove thumbnails for subfolders that no longer exist
     site_folder_set = {os.path.basename(subfolder) for subfolder in subfolders}
@@ -120,271 +449,1086 @@ def making_thumbnails():
         site = os.path.splitext(thumbnail_name)[0].replace('thumb_', '')
         if site not in site_folder_set:
             os.remove(existing_thumbnail)
+            thumbnail_index.pop(site, None)
+            SITE_JOB_SECONDS.remove(job='making_thumbnails', site=site)
             remove_site.append(site)
 
-    # Process all the folders
-    for folder_path in subfolders:
-        folder_name = os.path.basename(folder_path)
+    # Scan all the folders in parallel
+    scans = run_in_threads(
+        lambda folder_path: timed_site_scan('making_thumbnails', scan_site_thumbnail,
+                                            os.path.basename(folder_path), today),
+        subfolders)
 
-        # Try to find the settings folder,
-        # If not found, skip.
-        setting_folder = os.path.join(
-            os.getenv("IMAGES"), folder_name, 'setting')
-        if not os.path.exists(setting_folder):
+    render_jobs = []
+    for scan in scans:
+        # Skip sites without settings folder
+        if scan is None:
             continue
-
-        # Try to find the folder for today's date
-        image_folder = os.path.join(
-            os.getenv("IMAGES"), folder_name, today)
-        if not os.path.exists(image_folder):
-            # If the folder does not exist, use no_image_today.jpg
-            with Image.open('static/no_image_today.jpg') as img:
-                thumbnail_path = os.path.join(
-                    'static', f'thumb_{folder_name}.jpg')
-                img.save(thumbnail_path)
-                no_photo_yet_site.append(folder_name)
+        folder_name = scan['site']
+        thumbnail_path = os.path.join('static', f'thumb_{folder_name}.jpg')
+        indexed = thumbnail_index.get(folder_name, {})
+        thumbnail_exists = os.path.exists(thumbnail_path)
+
+        if scan['source'] is None:
+            # If there is no photo today, use no_image_today.jpg
+            placeholder_ready = thumbnail_exists and indexed and indexed.get('source') is None
+            if not placeholder_ready:
+                link_placeholder_thumbnail(thumbnail_path)
+                thumbnail_index[folder_name] = {
+                    'source': None, 'mtime': None, 'hash': file_md5(thumbnail_path)}
+            no_photo_yet_site.append(folder_name)
             continue
 
-        # If the folder exists, find the latest image file in the folder
-        image_files = glob(os.path.join(image_folder, '*.jpg'))
-        if not image_files:
-            with Image.open('static/no_image_today.jpg') as img:
-                thumbnail_path = os.path.join(
-                    'static', f'thumb_{folder_name}.jpg')
-                img.save(thumbnail_path)
-                no_photo_yet_site.append(folder_name)
+        # Skip when the latest image has already been processed
+        if thumbnail_exists and indexed.get('source') == scan['source'] \
+                and indexed.get('mtime') == scan['mtime']:
+            unchanged_site.append(folder_name)
             continue
-        latest_image_file = max(image_files)
 
-        # Generate the thumbnail of the latest image
-        with Image.open(latest_image_file) as img:
-            img.thumbnail((300, 200))
-            thumbnail_path = os.path.join(
-                'static', f'thumb_{folder_name}.jpg')
-            img.save(thumbnail_path)
-            thumbnail_made_site.append(folder_name)
+        render_jobs.append((scan, thumbnail_path))
+
+    # 새 프레임이 들어왔으므로 /images/<site>/recent 미리보기도 (없으면) 함께 만들어 둡니다.
+    preview_paths = []
+    for scan, _ in render_jobs:
+        preview_path, _ = preview_cache_path(scan['site'], scan['source'], scan['mtime'])
+        preview_paths.append(preview_path)
+
+    # Generate the thumbnails of the latest images in parallel
+    # 임시 파일에 저장 후 교체: placeholder 와 hard link 된 inode 를 덮어쓰지 않기 위함
+    results = run_in_processes(
+        render_thumbnail,
+        [scan['source'] for scan, _ in render_jobs],
+        [thumbnail_path for _, thumbnail_path in render_jobs],
+        [THUMBNAIL_SIZE] * len(render_jobs),
+        [None if os.path.exists(preview_path) else preview_path for preview_path in preview_paths],
+        [PREVIEW_SIZE] * len(render_jobs))
+    for (scan, thumbnail_path), preview_path, timings in zip(render_jobs, preview_paths, results):
+        if 'error' in timings:
+            # index 를 갱신하지 않으므로 다음 실행에서 (업로드가 끝난) 같은 사진으로 다시 시도합니다.
+            app.logger.warning(f'Thumbnail failed for {scan["site"]} ({scan["source"]}): {timings["error"]}',
+                               extra={'event': 'making_thumbnails', 'site': scan['site']})
+            failed_site.append(scan['site'])
+            continue
+        if 'preview' in timings:
+            remove_stale_previews(scan['site'], preview_path)
+        for kind, kind_timings in timings.items():
+            observe_resize(kind, kind_timings)
+        # 사이트별 시간에 PIL 시간을 더해 어느 사이트가 CPU 를 쓰는지 보이게 합니다.
+        SITE_JOB_SECONDS.inc(sum(sum(t) for t in timings.values()),
+                             job='making_thumbnails', site=scan['site'])
+        thumbnail_index[scan['site']] = {
+            'source': scan['source'],
+            'mtime': scan['mtime'],
+            'hash': file_md5(thumbnail_path)}
+        thumbnail_made_site.append(scan['site'])
+
+    write_json_atomic(THUMBNAIL_INDEX_PATH, thumbnail_index)
 
     app.logger.info(f'Sites removed                : {remove_site}')
     app.logger.info(f'Sites with no photos yet     : {no_photo_yet_site}')
     app.logger.info(f'Sites with thumbnails created: {thumbnail_made_site}')
+    app.logger.info(f'Sites with thumbnails kept   : {unchanged_site}')
+    app.logger.info(f'Sites with thumbnails failed : {failed_site}')
+    app.logger.info(f'making_thumbnails finished in {time.monotonic() - started:.2f}s',
+                    extra={'event': 'making_thumbnails',
+                           'duration': round(time.monotonic() - started, 3)})
 
 
-@scheduler.scheduled_job('cron',
-                         id='making_setting_json',
-                         hour='*',
-                         minute='*/10',
+def pyramid_path(site, date, photo, size):
+    return os.path.join(PYRAMID_CACHE_DIR, site, date, f'{photo}_{size}.jpg')
+
+
+def ensure_photo_variant(site, date, photo, source_path, size):
+    """size 사본의 경로를 반환합니다. 없거나 원본보다 오래되었으면 만듭니다."""
+    variant_path = pyramid_path(site, date, photo, size)
+    try:
+        if os.path.getmtime(variant_path) >= os.path.getmtime(source_path):
+            return variant_path
+    except FileNotFoundError:
+        pass
+    timings = render_variants(source_path, [(variant_path, PYRAMID_SIZES[size])])
+    if timings is None:
+        raise FileNotFoundError(source_path)
+    if isinstance(timings, dict):
+        raise ImageDecodeError(timings['error'])
+    observe_resize('pyramid', timings)
+    return variant_path
+
+
+def prune_pyramids(max_age_seconds):
+    """
+    max_age_seconds 동안 만들어지거나 읽히지 않은 사본을 지웁니다.
+    사진 날짜가 아니라 파일 자체의 mtime / atime 을 보므로 지난 날짜를 볼 때 새로 만든 사본은 남습니다.
+    지운 파일 수를 반환합니다.
+    """
+    if not os.path.isdir(PYRAMID_CACHE_DIR):
+        return 0
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for site in os.listdir(PYRAMID_CACHE_DIR):
+        site_dir = os.path.join(PYRAMID_CACHE_DIR, site)
+        for date in os.listdir(site_dir):
+            date_dir = os.path.join(site_dir, date)
+            with os.scandir(date_dir) as entries:
+                for entry in entries:
+                    try:
+                        stat = entry.stat()
+                        if max(stat.st_mtime, stat.st_atime) < cutoff:
+                            os.remove(entry.path)
+                            removed += 1
+                    except FileNotFoundError:
+                        pass
+            try:
+                # 비어 있을 때만 지워집니다.
+                os.rmdir(date_dir)
+            except OSError:
+                pass
+    return removed
+
+
+# sprite offset map 캐시: (site, date) -> (만들 때의 사진 tuple, map)
+sprite_map_cache = {}
+sprite_locks = {}
+sprite_locks_lock = threading.Lock()
+# 요청에서 필요해진 sprite 는 이 thread pool 에서 만듭니다 (지난 날짜는 원본을 모두 디코딩할 수 있음).
+SPRITE_BUILD_WORKERS = int(os.getenv('SPRITE_BUILD_WORKERS', 1))
+sprite_executor = ThreadPoolExecutor(max_workers=SPRITE_BUILD_WORKERS, thread_name_prefix='sprite')
+sprite_pending = set()
+
+
+def sprite_lock(site, date):
+    with sprite_locks_lock:
+        return sprite_locks.setdefault((site, date), threading.Lock())
+
+
+def sprite_sheet_path(site, date, sheet):
+    return os.path.join(SPRITE_CACHE_DIR, site, f'{date}_{sheet}.jpg')
+
+
+def sprite_source(site, date, photo_file):
+    """small 사본이 있으면 원본 대신 사용합니다 (디코딩이 훨씬 가벼움)."""
+    small_path = pyramid_path(site, date, os.path.splitext(photo_file)[0], 'small')
+    if os.path.exists(small_path):
+        return small_path
+    return os.path.join(os.getenv('IMAGES'), site, date, photo_file)
+
+
+def load_sprite_map(map_path):
+    try:
+        with open(map_path, 'r') as f:
+            sprite_map = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    # 배치가 바뀌었으면 처음부터 다시 만듭니다.
+    if sprite_map.get('tile') != list(THUMBNAIL_SIZE) or sprite_map.get('columns') != SPRITE_COLUMNS \
+            or sprite_map.get('sheet_frames') != SPRITE_SHEET_FRAMES:
+        return None
+    return sprite_map
+
+
+def update_day_sprite(site, date):
+    """
+    site/date 의 sprite sheet 와 offset map 을 인덱스의 사진 목록에 맞추고 map 을 반환합니다.
+    SPRITE_SHEET_FRAMES 장씩 sheet 를 나누고, sheet 에 사진이 뒤에 추가되기만 했으면 새 칸만 그립니다.
+    목록이 그대로면 다시 만들지 않으므로 지난 날짜의 sprite 는 한 번 만든 뒤 계속 재사용됩니다.
+    사진이 없으면 None.
+    """
+    photos = indexed_jpgs(site, date)
+    if not photos:
+        return None
+    cached = sprite_map_cache.get((site, date))
+    if cached and cached[0] is photos:
+        return cached[1]
+
+    map_path = os.path.join(SPRITE_CACHE_DIR, site, f'{date}.json')
+    with sprite_lock(site, date):
+        sprite_map = load_sprite_map(map_path)
+        old_sheets = sprite_map['sheets'] if sprite_map else []
+        if [photo for sheet in old_sheets for photo in sheet['photos']] != list(photos):
+            os.makedirs(os.path.dirname(map_path), exist_ok=True)
+            sheets = []
+            for index, start in enumerate(range(0, len(photos), SPRITE_SHEET_FRAMES)):
+                chunk = list(photos[start:start + SPRITE_SHEET_FRAMES])
+                old = old_sheets[index] if index < len(old_sheets) else None
+                sheet_path = sprite_sheet_path(site, date, index)
+                reusable = old is not None and os.path.exists(sheet_path) \
+                    and chunk[:len(old['photos'])] == old['photos']
+                if reusable and len(chunk) == len(old['photos']):
+                    sheets.append(old)
+                    continue
+                base_count = len(old['photos']) if reusable else 0
+                boxes, timings = render_sprite_sheet(
+                    [sprite_source(site, date, photo) for photo in chunk[base_count:]],
+                    sheet_path, THUMBNAIL_SIZE, SPRITE_COLUMNS,
+                    base_path=sheet_path if reusable else None, base_count=base_count)
+                observe_resize('sprite', timings)
+                sheets.append({'photos': chunk,
+                               'boxes': (old['boxes'][:base_count] if reusable else []) + boxes,
+                               'version': os.stat(sheet_path).st_mtime_ns})
+            # 사진이 줄어 남은 sheet 파일 정리
+            for index in range(len(sheets), len(old_sheets)):
+                try:
+                    os.remove(sprite_sheet_path(site, date, index))
+                except FileNotFoundError:
+                    pass
+            sprite_map = {'tile': list(THUMBNAIL_SIZE),
+                          'columns': SPRITE_COLUMNS,
+                          'sheet_frames': SPRITE_SHEET_FRAMES,
+                          'sheets': sheets}
+            write_json_atomic(map_path, sprite_map)
+        sprite_map_cache[(site, date)] = (photos, sprite_map)
+    return sprite_map
+
+
+def schedule_sprite_update(site, date):
+    """update_day_sprite 를 background 에서 실행합니다. 이미 대기 중이면 다시 넣지 않습니다."""
+    key = (site, date)
+    with sprite_locks_lock:
+        if key in sprite_pending:
+            return
+        sprite_pending.add(key)
+
+    def run():
+        try:
+            update_day_sprite(site, date)
+        except (OSError, IndexNotReady) as e:
+            app.logger.warning(f'Sprite update failed for {site}/{date}: {e}',
+                               extra={'event': 'sprite', 'site': site})
+        finally:
+            with sprite_locks_lock:
+                sprite_pending.discard(key)
+    sprite_executor.submit(run)
+
+
+def current_sprite_map(site, date):
+    """
+    요청 처리용 sprite map. 요청 thread 에서는 그리지 않습니다.
+    사진 목록과 맞지 않으면 갱신을 background 에 맡기고 그동안은 이전에 만든 map 을 반환합니다
+    (사진은 보통 뒤에 추가되기만 하므로 이전 map 은 새 사진만 빠진 상태입니다). 아직 없으면 None.
+    """
+    photos = indexed_jpgs(site, date)
+    cached = sprite_map_cache.get((site, date))
+    if cached and cached[0] is photos:
+        return cached[1]
+    schedule_sprite_update(site, date)
+    if cached:
+        return cached[1]
+    return load_sprite_map(os.path.join(SPRITE_CACHE_DIR, site, f'{date}.json'))
+
+
+# 미리 만들다 읽지 못한 원본: source_path -> 그때의 mtime (업로드가 끝나 mtime 이 바뀌면 다시 시도)
+pyramid_failures = {}
+
+
+@scheduler.scheduled_job('interval',
+                         id='making_pyramids',
+                         seconds=PYRAMID_SCAN_SECONDS,
                          misfire_grace_time=10,
-                         max_instances=3)
-def making_setting_json():
-    # Save Settings for each site
-    settings = {}
-    # Generate today's date string
-    today = datetime.now().strftime('%Y-%m-%d')
-    sites = [f.path for f in os.scandir(os.getenv('IMAGES')) if f.is_dir()]
-    setting_missing_site = []
-    no_photos_today_site = []
-    created_setting_site = []
-
-    for site in sites:
-        site_settings = {}
-        site_name = os.path.basename(site)
-        folders = [os.path.basename(f.path)
-                   for f in os.scandir(site) if f.is_dir()]
-        if 'setting' not in folders:
-            setting_missing_site.append(site.replace('images/', ' '))
-            continue
-        else:
-            file_path = os.path.join(site, 'setting', 'settings.txt')
-            if not os.path.exists(file_path):
-                setting_missing_site.append(site.replace('images/', ' '))
+                         max_instances=1)
+@timed_job(PYRAMID_SCAN_SECONDS)
+def making_pyramids():
+    """
+    오늘/어제 폴더의 새 프레임마다 small/medium/large 사본을 미리 만듭니다.
+    캐시 폴더 목록으로 없는 사본만 찾고, 최신 프레임부터 PYRAMID_MAX_PER_RUN 개까지 process pool 로 만듭니다.
+    """
+    started = time.monotonic()
+    render_jobs = []
+    failures = {}
+    hot_dates = image_index.hot_dates()
+    for site in image_index.sites():
+        for date in hot_dates:
+            photos = indexed_jpgs(site, date)
+            if not photos:
                 continue
-            with open(file_path, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or '=' not in line:
+            try:
+                existing = set(os.listdir(os.path.join(PYRAMID_CACHE_DIR, site, date)))
+            except FileNotFoundError:
+                existing = set()
+            for photo_file in photos:
+                photo = os.path.splitext(photo_file)[0]
+                targets = [(pyramid_path(site, date, photo, size), dimensions)
+                           for size, dimensions in PYRAMID_SIZES.items()
+                           if f'{photo}_{size}.jpg' not in existing]
+                if not targets:
+                    continue
+                source_path = os.path.join(os.getenv('IMAGES'), site, date, photo_file)
+                if source_path in pyramid_failures:
+                    try:
+                        retry = os.path.getmtime(source_path) != pyramid_failures[source_path]
+                    except OSError:
+                        retry = False
+                    if not retry:
+                        failures[source_path] = pyramid_failures[source_path]
                         continue
-                    key, _, value = line.partition('=')
-                    site_settings[key.strip()] = value.strip().strip('"')
-            required_keys = ["time_start", "time_end", "time_interval"]
-            missing_keys = [k for k in required_keys if k not in site_settings]
-            if missing_keys:
-                app.logger.warning(f'Site {site_name} missing keys in settings.txt: {missing_keys}')
-                setting_missing_site.append(site_name)
-                continue
+                render_jobs.append((source_path, targets))
+    render_jobs.sort(key=lambda job: os.path.basename(job[0]), reverse=True)
+    batch = render_jobs[:PYRAMID_MAX_PER_RUN]
+
+    results = run_in_processes(render_variants,
+                               [source for source, _ in batch],
+                               [targets for _, targets in batch])
+    for (source_path, _), timings in zip(batch, results):
+        if isinstance(timings, dict):
+            app.logger.warning(f'Pyramid failed for {source_path}: {timings["error"]}',
+                               extra={'event': 'making_pyramids'})
             try:
-                # Calculate Shooting Count of today
-                start_minutes = int(
-                    site_settings["time_start"][:2]) * 60 + int(site_settings["time_start"][2:])
-                end_minutes = int(
-                    site_settings["time_end"][:2]) * 60 + int(site_settings["time_end"][2:])
-                interval_minutes = int(site_settings["time_interval"])
-            except (ValueError, IndexError) as e:
-                app.logger.warning(f'Site {site_name} has invalid time settings: {e}')
-                setting_missing_site.append(site_name)
-                continue
-            if interval_minutes <= 0:
-                app.logger.warning(f'Site {site_name} has invalid time_interval: {interval_minutes}')
-                setting_missing_site.append(site_name)
+                failures[source_path] = os.path.getmtime(source_path)
+            except OSError:
+                pass
+        elif timings is not None:
+            observe_resize('pyramid', timings)
+    # 오늘/어제 밖으로 밀려난 원본은 기록에서도 빠집니다.
+    pyramid_failures.clear()
+    pyramid_failures.update(failures)
+
+    # 새로 만든 small 사본으로 오늘/어제 sprite 에 새 프레임 칸을 덧붙입니다.
+    def refresh_sprite(site_date):
+        try:
+            update_day_sprite(*site_date)
+        except OSError as e:
+            app.logger.warning(f'Sprite update failed for {site_date}: {e}',
+                               extra={'event': 'making_pyramids', 'site': site_date[0]})
+    run_in_threads(refresh_sprite, [(site, date) for site in image_index.sites() for date in hot_dates])
+
+    app.logger.info(f'making_pyramids rendered {len(batch)} frames ({len(render_jobs) - len(batch)} left, '
+                    f'{len(failures)} unreadable) in {time.monotonic() - started:.2f}s',
+                    extra={'event': 'making_pyramids',
+                           'duration': round(time.monotonic() - started, 3)})
+
+
+@scheduler.scheduled_job('cron',
+                         id='pruning_pyramids',
+                         hour='*',
+                         minute='40',
+                         misfire_grace_time=60,
+                         max_instances=1)
+@timed_job(3600)
+def pruning_pyramids():
+    """PYRAMID_RETENTION_DAYS 동안 쓰이지 않은 사본을 지웁니다 (파일 수만큼 stat 하므로 한 시간에 한 번)."""
+    started = time.monotonic()
+    removed = prune_pyramids(PYRAMID_RETENTION_DAYS * 86400)
+    app.logger.info(f'pruning_pyramids removed {removed} files in {time.monotonic() - started:.2f}s',
+                    extra={'event': 'pruning_pyramids',
+                           'duration': round(time.monotonic() - started, 3)})
+
+
+def read_site_settings(site):
+    """
+    site 폴더의 setting/settings.txt 를 읽어 (site_settings, start_minutes, end_minutes, interval_minutes) 를 반환합니다.
+    필요한 값이 없거나 잘못되었으면 None.
+    """
+    site_settings = {}
+    site_name = os.path.basename(site)
+    file_path = os.path.join(site, 'setting', 'settings.txt')
+    with open(file_path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or '=' not in line:
                 continue
-            crosses_midnight = end_minutes < start_minutes
-            if crosses_midnight:
-                end_minutes += 1440
-            site_settings["shooting_count"] = (
-                end_minutes - start_minutes) // interval_minutes + 1
-            # Calculate Shooting Count of current time
-            current_time = datetime.now()
-            current_minutes_raw = current_time.hour * 60 + current_time.minute
-            current_minutes = current_minutes_raw + (1440 if crosses_midnight and current_minutes_raw < start_minutes else 0)
-            current_minutes = min(current_minutes, end_minutes)
-            site_settings["shooting_count_till_now"] = max(0, (
-                current_minutes - start_minutes) // interval_minutes + 1)
-
-        is_after_midnight = crosses_midnight and current_minutes_raw < start_minutes
-        if is_after_midnight:
-            yesterday = (current_time - timedelta(days=1)).strftime('%Y-%m-%d')
-            photo_folders = [f for f in [yesterday, today] if f in folders]
-        else:
-            photo_folders = [today] if today in folders else []
-
-        if photo_folders:
-            all_photos = []
-            for folder in photo_folders:
-                all_photos.extend(
-                    list_photo_filenames(os.path.join(site, folder))
-                )
-            site_settings['photos_count'] = len(all_photos)
-            site_settings['recent_photo'] = sorted(all_photos)[-1] if all_photos else "No Photo Available"
-            created_setting_site.append(site.replace('images/', ' '))
-        else:
-            site_settings['photos_count'] = 0
-            site_settings['recent_photo'] = "No Photo Available"
-            no_photos_today_site.append(site.replace('images/', ' '))
+            key, _, value = line.partition('=')
+            site_settings[key.strip()] = value.strip().strip('"')
+    required_keys = ["time_start", "time_end", "time_interval"]
+    missing_keys = [k for k in required_keys if k not in site_settings]
+    if missing_keys:
+        app.logger.warning(f'Site {site_name} missing keys in settings.txt: {missing_keys}',
+                           extra={'event': 'settings_invalid', 'site': site_name})
+        return None
+    try:
+        # HHMM -> minutes
+        start_minutes = int(
+            site_settings["time_start"][:2]) * 60 + int(site_settings["time_start"][2:])
+        end_minutes = int(
+            site_settings["time_end"][:2]) * 60 + int(site_settings["time_end"][2:])
+        interval_minutes = int(site_settings["time_interval"])
+    except (ValueError, IndexError) as e:
+        app.logger.warning(f'Site {site_name} has invalid time settings: {e}',
+                           extra={'event': 'settings_invalid', 'site': site_name})
+        return None
+    if interval_minutes <= 0:
+        app.logger.warning(f'Site {site_name} has invalid time_interval: {interval_minutes}',
+                           extra={'event': 'settings_invalid', 'site': site_name})
+        return None
+    return site_settings, start_minutes, end_minutes, interval_minutes
+
+
+# 사이트별 settings.txt 파싱 결과 캐시: site -> (settings.txt mtime_ns, read_site_settings 결과)
+# mtime 은 이미지 인덱스가 inotify / 주기적 rescan 으로 갱신하므로 파일이 바뀐 사이트만 다시 읽습니다.
+site_settings_cache = {}
+site_settings_lock = threading.Lock()
+
+
+def cached_site_settings(site):
+    """site 의 read_site_settings 결과. setting 폴더나 settings.txt 가 없거나 잘못되었으면 None."""
+    if not image_index.has_setting(site):
+        return None
+    settings_mtime = image_index.settings_mtime(site)
+    if settings_mtime is None:
+        return None
+    with site_settings_lock:
+        cached = site_settings_cache.get(site)
+    if cached and cached[0] == settings_mtime:
+        return cached[1]
 
-        settings[site_name] = site_settings
+    try:
+        parsed = read_site_settings(os.path.join(os.getenv('IMAGES'), site))
+    except OSError as e:
+        app.logger.warning(f'Site {site} settings.txt could not be read: {e}',
+                           extra={'event': 'settings_invalid', 'site': site})
+        parsed = None
+    if parsed is not None and not parsed[0].get('device_number'):
+        app.logger.warning(f'Site {site} missing device_number in settings.txt',
+                           extra={'event': 'settings_invalid', 'site': site})
+    with site_settings_lock:
+        site_settings_cache[site] = (settings_mtime, parsed)
+    return parsed
+
+
+def site_information(site, current_time, connectivity):
+    """
+    요청 시점의 사이트 정보를 만듭니다. settings.txt 는 바뀐 경우에만 다시 읽고,
+    shooting_count_till_now, photos_count, recent_photo, ssh 는 메모리 인덱스와 probe 결과로 바로 계산합니다.
+    settings.txt 가 없거나 잘못되었으면 None.
+    """
+    parsed = cached_site_settings(site)
+    if parsed is None:
+        return None
+    site_settings, start_minutes, end_minutes, interval_minutes = parsed
+    site_settings = dict(site_settings)
+
+    crosses_midnight = end_minutes < start_minutes
+    if crosses_midnight:
+        end_minutes += 1440
+    # Calculate Shooting Count of today
+    site_settings["shooting_count"] = (
+        end_minutes - start_minutes) // interval_minutes + 1
+    # Calculate Shooting Count of current time
+    current_minutes_raw = current_time.hour * 60 + current_time.minute
+    current_minutes = current_minutes_raw + (1440 if crosses_midnight and current_minutes_raw < start_minutes else 0)
+    current_minutes = min(current_minutes, end_minutes)
+    site_settings["shooting_count_till_now"] = max(0, (
+        current_minutes - start_minutes) // interval_minutes + 1)
+
+    today = current_time.strftime('%Y-%m-%d')
+    is_after_midnight = crosses_midnight and current_minutes_raw < start_minutes
+    if is_after_midnight:
+        yesterday = (current_time - timedelta(days=1)).strftime('%Y-%m-%d')
+        photo_folders = [yesterday, today]
+    else:
+        photo_folders = [today]
+    # 폴더마다 오름차순이고 yesterday 가 먼저이므로 마지막 폴더의 마지막 사진이 가장 최근
+    all_photos = [image_index.photos(site, folder) or () for folder in photo_folders]
+    site_settings['photos_count'] = sum(len(photos) for photos in all_photos)
+    recent = [(photos[-1], folder) for folder, photos in zip(photo_folders, all_photos) if photos]
+    recent_photo, recent_folder = max(recent) if recent else ("No Photo Available", None)
+    site_settings['recent_photo'] = recent_photo
+    # 최근 사진이 있는 날짜 폴더 (파일 이름에 날짜가 없어도 경로를 만들 수 있도록)
+    site_settings['recent_photo_folder'] = recent_folder
+
+    # Use the last known device set from the connectivity probe
+    device_number = site_settings.get('device_number')
+    site_settings['ssh'] = bool(device_number) and connectivity['devices'] is not None \
+        and device_number.lower() in connectivity['devices']
+    site_settings['ssh_checked_at'] = connectivity['checked_at']
+    site_settings['ssh_stale'] = connectivity['stale']
+    return site_settings
+
+
+def current_site_information(sites=None):
+    """sites (기본: 인덱스의 모든 사이트) 중 settings.txt 가 있는 사이트의 정보 dict."""
+    current_time = datetime.now()
+    connectivity = connectivity_snapshot()
+    information = {}
+    for site in image_index.sites() if sites is None else sites:
+        site_settings = site_information(site, current_time, connectivity)
+        if site_settings is not None:
+            information[site] = site_settings
+    return information
+
+
+# 사이트 정보 변경 추적: site -> (마지막으로 본 정보, 그 정보가 처음 보인 version)
+# version 은 이 프로세스 안에서만 증가하므로 since token 앞에 프로세스마다 다른 epoch 를 붙입니다.
+INFORMATION_EPOCH = os.urandom(4).hex()
+information_versions = {'version': 0, 'sites': {}}
+information_versions_lock = threading.Lock()
+# probe 가 돌 때마다 바뀌는 값. 변경 비교와 ETag 에서는 빼므로 이것만 바뀌면 '변경 없음' 입니다.
+INFORMATION_VOLATILE_KEYS = ('ssh_checked_at',)
+
+
+def stable_information(site_settings):
+    return {key: value for key, value in site_settings.items() if key not in INFORMATION_VOLATILE_KEYS}
+
+
+def track_information(information):
+    """
+    사이트별 정보를 이전에 본 값과 비교하여, 바뀐 사이트가 있으면 version 을 하나 올려 그 사이트에 붙입니다.
+    {site: 그 사이트 정보가 마지막으로 바뀐 version} 을 반환합니다.
+    """
+    with information_versions_lock:
+        tracked = information_versions['sites']
+        stable = {site: stable_information(site_settings) for site, site_settings in information.items()}
+        changed = [site for site in information if site not in tracked or tracked[site][0] != stable[site]]
+        if changed:
+            information_versions['version'] += 1
+            for site in changed:
+                tracked[site] = (stable[site], information_versions['version'])
+        return {site: tracked[site][1] for site in information}
+
+
+def information_version(versions):
+    """
+    '<epoch>.<version>.<사이트 목록 hash>' 형식의 since token.
+    사이트가 추가/삭제되거나 권한이 바뀌면 hash 가 달라지므로 since 는 전체 응답으로 처리됩니다.
+    """
+    scope = hashlib.md5('\n'.join(sorted(versions)).encode()).hexdigest()[:8]
+    return f'{INFORMATION_EPOCH}.{max(versions.values(), default=0)}.{scope}'
+
+
+def information_etag(information):
+    """사이트 정보 내용의 hash. 프로세스와 무관하므로 worker 가 달라도 내용이 같으면 304 가 됩니다."""
+    stable = {site: stable_information(site_settings) for site, site_settings in information.items()}
+    return hashlib.md5(json.dumps(stable, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def information_changes(information, versions, version, since):
+    """since token 이후 바뀐 사이트 정보만 골라 (full, sites) 를 반환합니다. 쓸 수 없는 token 이면 전체."""
+    epoch, _, scope = version.split('.')
+    parts = since.split('.')
+    if len(parts) != 3 or parts[0] != epoch or parts[2] != scope or not parts[1].isdigit():
+        return True, information
+    since_version = int(parts[1])
+    return False, {site: site_settings for site, site_settings in information.items()
+                   if versions[site] > since_version}
+
+
+# 지난 날짜의 사진으로 <site>/daily/<date>.mp4 timelapse 를 만드는 작업 (ffmpeg 필요)
+TIMELAPSE_ENABLED = os.getenv('TIMELAPSE_ENABLED', 'true').lower() == 'true'
+TIMELAPSE_FFMPEG = os.getenv('TIMELAPSE_FFMPEG', 'ffmpeg')
+TIMELAPSE_FPS = int(os.getenv('TIMELAPSE_FPS', 24))
+TIMELAPSE_HEIGHT = int(os.getenv('TIMELAPSE_HEIGHT', 1080))
+# 동시에 돌리는 ffmpeg 수, ffmpeg 하나의 thread 수, 한 번 실행에서 만들 최대 영상 수, 영상 하나의 제한 시간
+TIMELAPSE_WORKERS = int(os.getenv('TIMELAPSE_WORKERS', 1))
+TIMELAPSE_THREADS = int(os.getenv('TIMELAPSE_THREADS', 2))
+TIMELAPSE_NICE = int(os.getenv('TIMELAPSE_NICE', 10))
+TIMELAPSE_MAX_PER_RUN = int(os.getenv('TIMELAPSE_MAX_PER_RUN', 10))
+TIMELAPSE_TIMEOUT = int(os.getenv('TIMELAPSE_TIMEOUT', 1800))
+# 촬영 종료 후 늦게 올라오는 사진을 기다리는 시간
+TIMELAPSE_GRACE_MINUTES = int(os.getenv('TIMELAPSE_GRACE_MINUTES', 30))
+# 렌더링 상태와 작업 중인 파일 (cache/timelapse/<site>/<date>.json, cache/timelapse/tmp/)
+# cache/timelapse/.lock 으로 여러 worker 중 하나만 making_timelapses 를 실행합니다.
+TIMELAPSE_CACHE_DIR = os.path.abspath(os.getenv('TIMELAPSE_CACHE_DIR', os.path.join('cache', 'timelapse')))
+
+
+def day_finished(date, start_minutes, end_minutes, now):
+    """
+    날짜 폴더에 더 이상 사진이 들어오지 않을 시각이 지났으면 True.
+    자정을 넘기는 촬영은 그 날짜 폴더가 자정까지 채워지므로 다음 날 0시를 기준으로 합니다.
+    """
+    day_end = end_minutes if end_minutes >= start_minutes else 1440
+    finished_at = datetime.strptime(date, '%Y-%m-%d') + timedelta(minutes=day_end + TIMELAPSE_GRACE_MINUTES)
+    return now >= finished_at
+
+
+def timelapse_state_path(site, date):
+    return os.path.join(TIMELAPSE_CACHE_DIR, site, f'{date}.json')
+
+
+def timelapse_source_state(site, date):
+    """다시 만들어야 하는지 비교하는 값: 사진 수 + 날짜 폴더 mtime (스토리지를 다시 읽지 않도록 인덱스 값)."""
+    return {'frames': len(indexed_jpgs(site, date)), 'mtime_ns': image_index.date_mtime(site, date)}
+
+
+def timelapse_needed(site, date, video_exists):
+    """
+    만들 필요가 있으면 True. video_exists 는 daily/<date>.mp4 가 있는지 (사이트마다 한 번 나열한 결과).
+    daily/ 에 이 작업이 만들지 않은 영상이 이미 있으면 (외부에서 넣은 영상) 덮어쓰지 않습니다.
+    """
+    try:
+        with open(timelapse_state_path(site, date), 'r') as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return not video_exists
+    if not video_exists:
+        return True
+    return state.get('source') != timelapse_source_state(site, date)
+
+
+def glob_escape(path):
+    # ffmpeg glob pattern 에서 특수 문자로 해석되지 않도록
+    return re.sub(r'([*?\[\]])', r'\\\1', path)
+
+
+def render_timelapse(site, date):
+    """
+    ffmpeg 로 cache/timelapse/tmp 에 영상을 만든 뒤 완성된 파일만 daily/<date>.mp4 로 옮깁니다.
+    중간에 멈추면 임시 파일만 남으므로 다음 실행에서 그 날짜를 처음부터 다시 만듭니다.
+    """
+    date_path = os.path.join(os.getenv('IMAGES'), site, date)
+    daily_path = os.path.join(os.getenv('IMAGES'), site, 'daily')
+    tmp_dir = os.path.join(TIMELAPSE_CACHE_DIR, 'tmp')
+
+    command = [TIMELAPSE_FFMPEG, '-nostdin', '-y', '-loglevel', 'error',
+               '-framerate', str(TIMELAPSE_FPS),
+               '-pattern_type', 'glob', '-i', os.path.join(glob_escape(date_path), '*.jpg'),
+               '-vf', f"scale=-2:'min({TIMELAPSE_HEIGHT},ih)'",
+               '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23', '-pix_fmt', 'yuv420p',
+               '-movflags', '+faststart', '-threads', str(TIMELAPSE_THREADS)]
+    # API 요청 처리보다 낮은 우선순위로 실행
+    if TIMELAPSE_NICE and shutil.which('nice'):
+        command = ['nice', '-n', str(TIMELAPSE_NICE)] + command
+
+    started = time.monotonic()
+    tmp_path = staging_path = None
+    try:
+        source = timelapse_source_state(site, date)
+        os.makedirs(tmp_dir, exist_ok=True)
+        os.makedirs(daily_path, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, prefix=f'{site}_{date}_', suffix='.mp4')
+        os.close(fd)
+        subprocess.run(command + [tmp_path], check=True, capture_output=True, timeout=TIMELAPSE_TIMEOUT)
+        # daily/ 안에서 rename 하여 목록에는 완성된 파일만 보이게 합니다.
+        fd, staging_path = tempfile.mkstemp(dir=daily_path, prefix=f'.{date}.', suffix='.mp4.tmp')
+        os.close(fd)
+        shutil.move(tmp_path, staging_path)
+        # mkstemp 는 0600 으로 만들므로 다른 영상과 같은 권한으로 맞춥니다.
+        os.chmod(staging_path, FILE_MODE)
+        os.replace(staging_path, os.path.join(daily_path, f'{date}.mp4'))
+    except OSError as e:
+        app.logger.error(f'Timelapse render failed for {site}/{date}: {e}',
+                         extra={'event': 'timelapse', 'site': site})
+        return False
+    except subprocess.CalledProcessError as e:
+        app.logger.error(f'Timelapse render failed for {site}/{date}: {e.stderr.decode(errors="replace")[-500:]}',
+                         extra={'event': 'timelapse', 'site': site})
+        return False
+    except subprocess.TimeoutExpired:
+        app.logger.error(f'Timelapse render timed out for {site}/{date} after {TIMELAPSE_TIMEOUT}s',
+                         extra={'event': 'timelapse', 'site': site})
+        return False
+    finally:
+        for path in (tmp_path, staging_path):
+            try:
+                if path:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    try:
+        os.makedirs(os.path.dirname(timelapse_state_path(site, date)), exist_ok=True)
+        write_json_atomic(timelapse_state_path(site, date),
+                          {'source': source, 'rendered_at': datetime.now().isoformat(timespec='seconds')})
+    except OSError as e:
+        # 영상은 만들어졌으므로 다음 실행에서 상태 파일만 없어 다시 만들게 됩니다.
+        app.logger.warning(f'Timelapse state not saved for {site}/{date}: {e}',
+                           extra={'event': 'timelapse', 'site': site})
+    app.logger.info(f'Timelapse rendered: {site}/{date} ({source["frames"]} frames) '
+                    f'in {time.monotonic() - started:.2f}s',
+                    extra={'event': 'timelapse', 'site': site,
+                           'duration': round(time.monotonic() - started, 3)})
+    return True
 
-    # Check connection via tailscale (primary) or SSH (fallback)
+
+@scheduler.scheduled_job('cron',
+                         id='making_timelapses',
+                         hour='*',
+                         minute='20',
+                         misfire_grace_time=60,
+                         max_instances=1)
+@timed_job(3600)
+def making_timelapses():
+    """
+    끝난 날짜마다 timelapse 를 만듭니다. 최신 날짜부터 TIMELAPSE_MAX_PER_RUN 개까지 만들고
+    나머지는 다음 실행에서 이어서 만듭니다.
+    """
+    if not TIMELAPSE_ENABLED:
+        return
+    if shutil.which(TIMELAPSE_FFMPEG) is None:
+        app.logger.warning(f'Timelapse skipped: {TIMELAPSE_FFMPEG} not found',
+                           extra={'event': 'timelapse'})
+        return
+
+    os.makedirs(TIMELAPSE_CACHE_DIR, exist_ok=True)
+    with open(os.path.join(TIMELAPSE_CACHE_DIR, '.lock'), 'w') as lock_file:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                app.logger.info('making_timelapses skipped: running in another worker',
+                                extra={'event': 'timelapse'})
+                return
+        render_pending_timelapses()
+
+
+def render_pending_timelapses():
+    """making_timelapses 의 본문. timelapse lock 을 가진 상태에서 호출합니다."""
+    # 이전 실행이 중간에 멈추며 남긴 임시 파일 정리 (lock 을 가진 동안에는 다른 worker 가 만들지 않음)
+    stale_paths = glob(os.path.join(TIMELAPSE_CACHE_DIR, 'tmp', '*.mp4')) \
+        + glob(os.path.join(glob_escape(os.getenv('IMAGES')), '*', 'daily', '.*.mp4.tmp'))
+    for stale_path in stale_paths:
+        try:
+            os.remove(stale_path)
+        except OSError as e:
+            app.logger.warning(f'Timelapse temp file not removed: {stale_path}: {e}',
+                               extra={'event': 'timelapse'})
+
+    now = datetime.now()
+    pending = []
+    for site in image_index.sites():
+        if not image_index.has_setting(site):
+            continue
+        site_path = os.path.join(os.getenv('IMAGES'), site)
+        try:
+            parsed = read_site_settings(site_path)
+        except OSError:
+            continue
+        if parsed is None:
+            continue
+        _, start_minutes, end_minutes, _ = parsed
+        finished = [date for date in image_index.dates(site)
+                    if indexed_jpgs(site, date) and day_finished(date, start_minutes, end_minutes, now)]
+        if not finished:
+            continue
+        # 날짜마다 stat 하지 않고 daily/ 를 한 번만 나열합니다.
+        try:
+            with os.scandir(os.path.join(site_path, 'daily')) as entries:
+                videos = {entry.name for entry in entries}
+        except FileNotFoundError:
+            videos = set()
+        except OSError:
+            continue
+        for date in finished:
+            if timelapse_needed(site, date, f'{date}.mp4' in videos):
+                pending.append((date, site))
+
+    # 최신 날짜부터
+    pending.sort(reverse=True)
+    batch = pending[:TIMELAPSE_MAX_PER_RUN]
+    if not batch:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, TIMELAPSE_WORKERS)) as executor:
+        results = list(executor.map(lambda job: render_timelapse(job[1], job[0]), batch))
+
+    app.logger.info(f'making_timelapses rendered {sum(results)}/{len(batch)} videos, '
+                    f'{len(pending) - len(batch)} left for the next run',
+                    extra={'event': 'timelapse'})
+
+
+# 장비 연결 상태 probe: making_setting_json 과 분리하여 따로 실행하고 결과를 메모리에 보관합니다.
+CONNECTIVITY_TIMEOUT = int(os.getenv('CONNECTIVITY_TIMEOUT', 10))
+CONNECTIVITY_PROBE_SECONDS = int(os.getenv('CONNECTIVITY_PROBE_SECONDS', 120))
+connectivity_lock = threading.Lock()
+connectivity_state = {'devices': None, 'checked_at': None, 'source': None, 'error': None}
+
+
+def probe_tailscale():
+    ts_result = subprocess.run(
+        ["tailscale", "status", "--json"],
+        capture_output=True, text=True, check=True, timeout=CONNECTIVITY_TIMEOUT
+    )
+    ts_status = json.loads(ts_result.stdout)
+    return {
+        peer["HostName"].lower()
+        for peer in ts_status.get("Peer", {}).values()
+        if peer.get("Online", False)
+    }
+
+
+def probe_ssh():
+    command = ["ssh", '-o', 'BatchMode=yes', '-o', f'ConnectTimeout={CONNECTIVITY_TIMEOUT}',
+               os.getenv("SSH_HOST"), '-p', os.getenv("SSH_PORT"), os.getenv("SSH_COMMAND")]
+    result = subprocess.run(
+        command, capture_output=True, text=True, check=True, timeout=CONNECTIVITY_TIMEOUT).stdout
+    ssh_numbers = []
+    for line in result.splitlines():
+        match = re.search(r'127\.0\.0\.1:(\d+)', line)
+        if match:
+            port = match.group(1).replace('22', '')
+            if port.isdigit():
+                ssh_numbers.append(int(port))
+    return {f'bmotion{n}' for n in ssh_numbers}
+
+
+@scheduler.scheduled_job('interval',
+                         id='probe_connectivity',
+                         seconds=CONNECTIVITY_PROBE_SECONDS,
+                         next_run_time=datetime.now(),
+                         misfire_grace_time=10,
+                         max_instances=1)
+@timed_job(CONNECTIVITY_PROBE_SECONDS)
+def probe_connectivity():
+    """
+    tailscale (primary) 또는 SSH (fallback) 로 연결된 장비 목록을 확인합니다.
+    둘 다 실패하면 이전 결과를 그대로 두어 stale 로 표시되게 합니다.
+    """
     connected_devices = None
+    source = None
+    error = None
 
     # Primary: tailscale status
     try:
-        ts_result = subprocess.run(
-            ["tailscale", "status", "--json"],
-            capture_output=True, text=True, check=True
-        )
-        ts_status = json.loads(ts_result.stdout)
-        connected_devices = {
-            peer["HostName"].lower()
-            for peer in ts_status.get("Peer", {}).values()
-            if peer.get("Online", False)
-        }
-        app.logger.info(f'Tailscale check succeeded: {sorted(connected_devices)}')
+        connected_devices = probe_tailscale()
+        source = 'tailscale'
+        app.logger.info(f'Tailscale check succeeded: {sorted(connected_devices)}',
+                        extra={'event': 'connectivity_check'})
     except Exception as e:
-        app.logger.warning(f'Tailscale check failed, trying SSH fallback: {e}')
+        app.logger.warning(f'Tailscale check failed, trying SSH fallback: {e}',
+                           extra={'event': 'connectivity_check'})
 
     # Fallback: SSH
     if connected_devices is None:
-        command = ["ssh", os.getenv("SSH_HOST"), '-p',
-                   os.getenv("SSH_PORT"), os.getenv("SSH_COMMAND")]
         try:
-            result = subprocess.run(
-                command, capture_output=True, text=True, check=True).stdout
-            ssh_numbers = []
-            for line in result.splitlines():
-                match = re.search(r'127\.0\.0\.1:(\d+)', line)
-                if match:
-                    port = match.group(1).replace('22', '')
-                    if port.isdigit():
-                        ssh_numbers.append(int(port))
-            connected_devices = {f'bmotion{n}' for n in ssh_numbers}
-            app.logger.info(f'SSH fallback succeeded: {connected_devices}')
-        except subprocess.CalledProcessError as e:
-            app.logger.error(f'SSH connection check failed: {e}')
-            return
+            connected_devices = probe_ssh()
+            source = 'ssh'
+            app.logger.info(f'SSH fallback succeeded: {connected_devices}',
+                            extra={'event': 'connectivity_check'})
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            error = str(e)
+            app.logger.error(f'SSH connection check failed: {e}',
+                             extra={'event': 'connectivity_check'})
         except Exception as e:
-            app.logger.error(f'SSH fallback parsing failed: {e}')
+            error = str(e)
+            app.logger.error(f'SSH fallback parsing failed: {e}',
+                             extra={'event': 'connectivity_check'})
+
+    with connectivity_lock:
+        if connected_devices is None:
+            connectivity_state['error'] = error
             return
+        connectivity_state.update(devices=connected_devices,
+                                  checked_at=datetime.now(),
+                                  source=source,
+                                  error=None)
+
+
+def connectivity_snapshot():
+    """
+    마지막으로 성공한 probe 결과를 반환합니다.
+    마지막 probe 가 실패했거나 결과가 probe 주기의 3배보다 오래되면 stale=True 입니다.
+    """
+    with connectivity_lock:
+        devices = connectivity_state['devices']
+        checked_at = connectivity_state['checked_at']
+        error = connectivity_state['error']
+    stale = checked_at is None or error is not None or \
+        (datetime.now() - checked_at).total_seconds() > CONNECTIVITY_PROBE_SECONDS * 3
+    return {'devices': set(devices) if devices is not None else None,
+            'checked_at': checked_at.isoformat(timespec='seconds') if checked_at else None,
+            'stale': stale}
 
-    for site_name, setting in settings.items():
-        device_number = setting.get('device_number')
-        if device_number:
-            settings[site_name]['ssh'] = device_number.lower() in connected_devices
-        else:
-            app.logger.warning(f'Site {site_name} missing device_number in settings.txt')
-            settings[site_name]['ssh'] = False
 
-    settings_json = json.dumps(settings, indent=4)
-    # Save Json into File
-    with open('settings.json', 'w') as json_file:
-        json_file.write(settings_json)
+@scheduler.scheduled_job('cron',
+                         id='making_setting_json',
+                         hour='*',
+                         minute='*/10',
+                         misfire_grace_time=10,
+                         max_instances=3)
+@timed_job(600)
+def making_setting_json():
+    """
+    API 는 요청 시점에 사이트 정보를 계산하므로, 이 작업은 외부 도구용 settings.json 스냅샷만 씁니다.
+    settings.txt 는 바뀐 사이트만 다시 읽고 사진 폴더는 나열하지 않습니다.
+    """
+    started = time.monotonic()
+    sites = image_index.sites()
+    settings = current_site_information(sites)
+    store_settings(settings)
+    publish_site_status(settings)
 
     app.logger.info(
-        f'Setting does not exist for the site  : {setting_missing_site}')
+        f'Setting does not exist for the site  : {[site for site in sites if site not in settings]}')
     app.logger.info(
-        f'Site with no photos today            : {no_photos_today_site}')
+        f'Site with no photos today            : {[site for site, info in settings.items() if not info["photos_count"]]}')
     app.logger.info(
-        f'Setting has been created for the site: {created_setting_site}')
+        f'Setting has been created for the site: {[site for site, info in settings.items() if info["photos_count"]]}')
+    app.logger.info(f'making_setting_json finished in {time.monotonic() - started:.2f}s',
+                    extra={'event': 'making_setting_json',
+                           'duration': round(time.monotonic() - started, 3)})
 
 
-# Load settings from settings.json
-def load_settings():
-    if not os.path.exists('settings.json'):
-        app.logger.warning('settings.json not found')
-        return {}
+# 마지막으로 status event 로 보낸 사이트 정보 (probe 시각 제외): site -> site_settings
+published_information = {}
+
+
+def publish_site_status(information):
+    """이전에 보낸 값과 달라진 사이트의 정보를 status event 로 보냅니다. probe 시각만 바뀐 경우는 보내지 않습니다."""
+    for site, site_settings in information.items():
+        stable = stable_information(site_settings)
+        if published_information.get(site) != stable:
+            published_information[site] = stable
+            publish_site_event('status', site, site_settings)
+
+
+# 사이트별 촬영 상태 시계열 (SQLite, 원본 sample -> 시간/일 단위로 downsampling)
+HEALTH_DB_PATH = os.getenv('HEALTH_DB_PATH', 'health.sqlite3')
+HEALTH_SAMPLE_SECONDS = int(os.getenv('HEALTH_SAMPLE_SECONDS', 300))
+health_store = HealthStore(HEALTH_DB_PATH,
+                           raw_retention_days=int(os.getenv('HEALTH_RAW_RETENTION_DAYS', 7)),
+                           hour_retention_days=int(os.getenv('HEALTH_HOUR_RETENTION_DAYS', 400)))
+
+
+def last_frame_time(site, information):
+    """site_information 의 최근 사진 파일 mtime (epoch 초). 사진이 없으면 None."""
+    folder = information.get('recent_photo_folder')
+    if folder is None:
+        return None
     try:
-        with open('settings.json', 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, OSError) as e:
-        app.logger.error(f'Failed to load settings.json: {e}')
-        return {}
+        return int(os.path.getmtime(os.path.join(os.getenv('IMAGES'), site, folder, information['recent_photo'])))
+    except OSError:
+        return None
+
+
+@scheduler.scheduled_job('interval',
+                         id='recording_site_health',
+                         seconds=HEALTH_SAMPLE_SECONDS,
+                         misfire_grace_time=30,
+                         max_instances=1)
+@timed_job(HEALTH_SAMPLE_SECONDS)
+def recording_site_health():
+    """
+    사이트마다 예상/실제 프레임 수, 연결 상태, 마지막 프레임 시각을 시계열 저장소에 추가합니다.
+    여러 worker 가 기록해도 같은 sample 시각으로 덮어쓰도록 시각을 sample 주기로 내림합니다.
+    """
+    now = int(time.time())
+    samples = []
+    for site, information in current_site_information().items():
+        samples.append({
+            'site': site,
+            'expected': information['shooting_count_till_now'],
+            'actual': information['photos_count'],
+            # probe 결과가 오래되었으면 연결 상태를 모르는 것으로 기록
+            'connected': None if information['ssh_stale'] else information['ssh'],
+            'last_frame': last_frame_time(site, information),
+        })
+    try:
+        health_store.record(now - now % HEALTH_SAMPLE_SECONDS, samples)
+    except sqlite3.Error as e:
+        app.logger.error(f'Site health sample failed: {e}', extra={'event': 'site_health'})
 
 
-def user_auth_sites(username):
-    data = mongo.db.users.find_one(
-        {'username': username}, {"sites": 1, "_id": 0})
-    if data is None:
-        return []
-    return data.get("sites") or []
+# 사이트 정보 스냅샷 (외부 도구용). API 는 이 파일을 읽지 않습니다.
+SETTINGS_PATH = 'settings.json'
 
 
-def is_admin(identity):
-    return identity.get("class") == "bmotion"
+def store_settings(settings):
+    """settings.json 을 원자적으로 교체합니다."""
+    write_json_atomic(SETTINGS_PATH, settings)
 
 
-def check_site_access(identity, site):
-    """사용자의 허가된 사이트면 True를 반환합니다."""
-    return site in user_auth_sites(identity.get('username'))
+# 사용자별 허가 사이트 캐시: username -> (만료 시각, sites, 읽을 때의 authz_version)
+# 관리자 작업은 MongoDB 의 authz_version 을 올리므로 다른 worker 의 캐시도
+# 늦어도 AUTHZ_VERSION_TTL 안에 무효화됩니다 (0 이면 요청마다 version 을 확인).
+AUTH_CACHE_TTL = float(os.getenv('AUTH_CACHE_TTL', 30))
+auth_cache_lock = threading.Lock()
+auth_cache = {}
+auth_cache_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
 
 
-def read_paginated_logs(log_type, page, page_size):
-    base_log_path = os.path.join('log', f'{log_type}.log')
-    rotated_log_paths = sorted(
-        glob(f'{base_log_path}.*'),
-        key=lambda path: int(path.rsplit('.', 1)[1]) if path.rsplit('.', 1)[1].isdigit() else 10**9
-    )
+# JWT 에 허가 사이트 목록을 넣는 모드: 토큰의 authz_version 이 현재 버전과 같을 때만 신뢰합니다.
+# authz_version 은 이 모드가 아니어도 worker 간 캐시 무효화에 사용합니다.
+JWT_EMBED_SITES = os.getenv('JWT_EMBED_SITES', 'false').lower() == 'true'
+# 목록의 JSON 크기가 이보다 크면 넣지 않고 캐시된 DB 조회를 씁니다.
+# 토큰은 Authorization header 와 /events 의 ?jwt= 로 보내므로 웹 서버의 header 제한(nginx 기본 8KB)보다 작게 유지합니다.
+JWT_EMBED_SITES_MAX_BYTES = int(os.getenv('JWT_EMBED_SITES_MAX_BYTES', 2048))
+AUTHZ_VERSION_TTL = float(os.getenv('AUTHZ_VERSION_TTL', 5))
+authz_version_cache = {}
+authz_index_ready = False
 
-    log_paths = [base_log_path] + rotated_log_paths
-    log_lines = []
 
-    for path in log_paths:
-        if not os.path.exists(path):
-            continue
+def authz_versions_collection():
+    global authz_index_ready
+    if not authz_index_ready:
+        mongo.db.authz_versions.create_index('username', unique=True)
+        authz_index_ready = True
+    return mongo.db.authz_versions
 
-        with open(path, 'r', encoding='utf-8', errors='replace') as f:
-            lines = f.readlines()
-            # 최신 로그가 먼저 오도록 파일 내부 라인 순서를 뒤집습니다.
-            for line in reversed(lines):
-                log_lines.append(line.rstrip('\n'))
 
-    total = len(log_lines)
-    total_pages = (total + page_size - 1) // page_size if total > 0 else 0
-    start = (page - 1) * page_size
-    end = start + page_size
+def current_authz_version(username):
+    now = time.monotonic()
+    with auth_cache_lock:
+        cached = authz_version_cache.get(username)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    with MONGO_SECONDS.time(collection='authz_versions', operation='find_one'):
+        data = authz_versions_collection().find_one(
+            {'username': username}, {'version': 1, '_id': 0})
+    version = data.get('version', 0) if data else 0
+
+    with auth_cache_lock:
+        authz_version_cache[username] = (now + AUTHZ_VERSION_TTL, version)
+    return version
+
+
+def bump_authz_version(username):
+    """이 사용자에게 발급된 토큰의 사이트 목록과 모든 worker 의 허가 사이트 캐시를 무효화합니다."""
+    data = authz_versions_collection().find_one_and_update(
+        {'username': username}, {'$inc': {'version': 1}},
+        upsert=True, return_document=ReturnDocument.AFTER)
+    with auth_cache_lock:
+        authz_version_cache[username] = (
+            time.monotonic() + AUTHZ_VERSION_TTL, data['version'])
+
+
+def invalidate_user_auth(username):
+    """사용자 권한이 바뀌는 관리자 작업 후 호출하여 캐시를 즉시 비웁니다."""
+    with auth_cache_lock:
+        auth_cache.pop(username, None)
+        auth_cache_stats['invalidations'] += 1
+    bump_authz_version(username)
+
+
+def user_auth_sites(username):
+    # 같은 요청 안에서는 한 번만 조회
+    request_cache = g.setdefault('auth_sites', {}) if has_request_context() else {}
+    if username in request_cache:
+        return request_cache[username]
+
+    now = time.monotonic()
+    # 사이트 목록보다 먼저 읽어, 그 사이에 version 이 오르면 다음 요청에서 다시 조회되게 합니다.
+    version = current_authz_version(username)
+    with auth_cache_lock:
+        cached = auth_cache.get(username)
+        if cached and cached[0] > now and cached[2] == version:
+            auth_cache_stats['hits'] += 1
+            request_cache[username] = cached[1]
+            return cached[1]
+        auth_cache_stats['misses'] += 1
+
+    with MONGO_SECONDS.time(collection='users', operation='find_one'):
+        data = mongo.db.users.find_one(
+            {'username': username}, {"sites": 1, "_id": 0})
+    sites = [] if data is None else data.get("sites") or []
+
+    with auth_cache_lock:
+        auth_cache[username] = (now + AUTH_CACHE_TTL, sites, version)
+    request_cache[username] = sites
+    return sites
 
-    return {
-        "logs": log_lines[start:end],
-        "total": total,
-        "total_pages": total_pages
-    }
+
+def is_admin(identity):
+    return identity.get("class") == "bmotion"
+
+
+def authorized_sites(identity, claims=None):
+    """
+    사용자의 허가된 사이트 목록을 반환합니다.
+    JWT_EMBED_SITES 모드에서 토큰의 authz_version 이 최신이면 DB 조회 없이 토큰의 목록을 사용합니다.
+    claims 를 주지 않으면 현재 Flask 요청의 JWT 를 사용합니다.
+    """
+    username = identity.get('username')
+    if JWT_EMBED_SITES:
+        if claims is None:
+            try:
+                claims = get_jwt()
+            except RuntimeError:
+                claims = {}
+        if 'sites' in claims and claims.get('authz_version') == current_authz_version(username):
+            return claims['sites']
+    return user_auth_sites(username)
+
+
+def check_site_access(identity, site, claims=None):
+    """사용자의 허가된 사이트면 True를 반환합니다."""
+    return site in authorized_sites(identity, claims)
 
 
 # auth - signup
@@ -394,12 +1538,14 @@ def signup():
     if not data or 'username' not in data or 'password' not in data or 'code' not in data:
         return jsonify({'message': 'Invalid data'}), 400
     if mongo.db.users.find_one({'username': data['username']}) or mongo.db.pending_users.find_one({'username': data['username']}):
-        app.logger.warning(f"Signup failed - username already exists: {data['username']}")
+        app.logger.warning(f"Signup failed - username already exists: {data['username']}",
+                           extra={'event': 'signup_failed', 'username': data['username']})
         return jsonify({'message': 'User already exists'}), 400
     hashed_password = generate_password_hash(data['password'])
     mongo.db.pending_users.insert_one(
         {'username': data['username'], 'password': hashed_password, 'code': data['code']})
-    app.logger.info(f"Signup requested: {data['username']}")
+    app.logger.info(f"Signup requested: {data['username']}",
+                    extra={'event': 'signup', 'username': data['username']})
     return jsonify({'message': 'User registered, awaiting approval'}), 201
 
 
@@ -442,7 +1588,9 @@ def approve_user(username):
     user['activate'] = True
     mongo.db.users.insert_one(user)
     mongo.db.pending_users.delete_one({'username': username})
-    app.logger.info(f"User approved: {username} by {current_user_identity.get('username')}")
+    invalidate_user_auth(username)
+    app.logger.info(f"User approved: {username} by {current_user_identity.get('username')}",
+                    extra={'event': 'user_approved', 'username': username})
     return jsonify({'message': f'User {username} approved and added to users'}), 200
 
 
@@ -459,7 +1607,8 @@ def decline_user(username):
     if not user:
         return jsonify({'message': 'User not found in pending list'}), 404
     mongo.db.pending_users.delete_one({'username': username})
-    app.logger.info(f"User declined: {username} by {current_user_identity.get('username')}")
+    app.logger.info(f"User declined: {username} by {current_user_identity.get('username')}",
+                    extra={'event': 'user_declined', 'username': username})
     return jsonify({'message': f'User {username} declined'}), 200
 
 
@@ -471,14 +1620,23 @@ def login():
         return jsonify({'message': 'Invalid data'}), 400
     user = mongo.db.users.find_one({'username': data['username']})
     if not user or not check_password_hash(user['password'], data['password']):
-        app.logger.warning(f"Login failed: {data.get('username', 'unknown')} from {request.remote_addr}")
+        app.logger.warning(f"Login failed: {data.get('username', 'unknown')} from {request.remote_addr}",
+                           extra={'event': 'login_failed', 'username': data.get('username', 'unknown')})
         return jsonify({'message': 'Invalid credentials'}), 400
     if not user.get('activate', False):
-        app.logger.warning(f"Login blocked - deactivated user: {data['username']} from {request.remote_addr}")
+        app.logger.warning(f"Login blocked - deactivated user: {data['username']} from {request.remote_addr}",
+                           extra={'event': 'login_blocked', 'username': data['username']})
         return jsonify({'message': 'Account is deactivated'}), 403
+    additional_claims = {}
+    sites = user.get('sites') or []
+    if JWT_EMBED_SITES and len(json.dumps(sites, separators=(',', ':')).encode()) <= JWT_EMBED_SITES_MAX_BYTES:
+        additional_claims = {'sites': sites,
+                             'authz_version': current_authz_version(user['username'])}
     access_token = create_access_token(
-        identity={'username': user['username'], 'class': user['class']})
-    app.logger.info(f"Login success: {user['username']} from {request.remote_addr}")
+        identity={'username': user['username'], 'class': user['class']},
+        additional_claims=additional_claims)
+    app.logger.info(f"Login success: {user['username']} from {request.remote_addr}",
+                    extra={'event': 'login_success', 'username': user['username']})
     return jsonify({'access_token': access_token, 'message': 'Login success.'}), 200
 
 
@@ -530,6 +1688,7 @@ def update_user_sites(username):
 
     if result.matched_count == 0:
         return jsonify({'message': 'User not found'}), 404
+    invalidate_user_auth(username)
     return jsonify({'message': 'Updated successfully'}), 200
 
 
@@ -548,6 +1707,7 @@ def activate_users(username):
     if result.matched_count == 0:
         return jsonify({'message': 'User not found'}), 404
 
+    invalidate_user_auth(username)
     return jsonify({'message': f'{username} activated'}), 200
 
 
@@ -566,6 +1726,7 @@ def deactivate_users(username):
     if result.matched_count == 0:
         return jsonify({'message': 'User not found'}), 404
 
+    invalidate_user_auth(username)
     return jsonify({'message': f'{username} deactivated'}), 200
 
 
@@ -583,20 +1744,85 @@ def delete_user(username):
     if result.deleted_count == 0:
         return jsonify({'message': 'User not found'}), 404
 
-    app.logger.warning(f"User deleted: {username} by {current_user_identity.get('username')}")
+    invalidate_user_auth(username)
+    app.logger.warning(f"User deleted: {username} by {current_user_identity.get('username')}",
+                       extra={'event': 'user_deleted', 'username': username})
     return jsonify({'message': 'User successfully deleted'})
 
 
+# auth admin - authorization cache statistics
+@app.route('/auth/cache', methods=['GET'])
+@jwt_required()
+def get_auth_cache_stats():
+    # admin 유저 권한 확인
+    current_user_identity = get_jwt_identity()
+    if (not is_admin(current_user_identity)):
+        return jsonify({'message': 'Not authorized'}), 403
+
+    with auth_cache_lock:
+        stats = dict(auth_cache_stats, size=len(auth_cache), ttl=AUTH_CACHE_TTL,
+                     version_ttl=AUTHZ_VERSION_TTL)
+    return jsonify(stats), 200
+
+
+# admin - image index size and age
+@app.route('/index/stats', methods=['GET'])
+@jwt_required()
+def get_image_index_stats():
+    # admin 유저 권한 확인
+    current_user_identity = get_jwt_identity()
+    if (not is_admin(current_user_identity)):
+        return jsonify({'message': 'Not authorized'}), 403
+
+    return jsonify(image_index.stats()), 200
+
+
+# Prometheus scraper 는 METRICS_TOKEN (Authorization: Bearer <token>) 으로 조회합니다.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+
+# admin - Prometheus metrics (route/job/PIL/MongoDB/fs scan timing)
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    authorization = request.headers.get('Authorization', '')
+    if not (METRICS_TOKEN and hmac.compare_digest(authorization, f'Bearer {METRICS_TOKEN}')):
+        # 토큰이 없으면 admin 유저만 조회 가능
+        verify_jwt_in_request()
+        if not is_admin(get_jwt_identity()):
+            return jsonify({'message': 'Not authorized'}), 403
+
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
+
+
+def not_modified(etag):
+    """If-None-Match 가 etag 와 같으면 JSON 을 만들지 않고 304 응답을 반환합니다. 다르면 None."""
+    if etag not in request.if_none_match:
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def json_with_etag(data, etag):
+    response = jsonify(data)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 # auth/monitor - return all current service site name list
 @app.route('/sites/all', methods=['GET'])
 @jwt_required()
 def all_sites_name_list():
-    settings = load_settings()
+    # settings.txt 가 있는 사이트
+    sites = [site for site in image_index.sites() if cached_site_settings(site) is not None]
     identity = get_jwt_identity()
-    if is_admin(identity):
-        return jsonify(list(settings.keys())), 200
-    auth_sites = set(user_auth_sites(identity.get('username')))
-    return jsonify([site for site in settings.keys() if site in auth_sites]), 200
+    if not is_admin(identity):
+        auth_sites = set(authorized_sites(identity))
+        sites = [site for site in sites if site in auth_sites]
+    etag = hashlib.md5('\n'.join(sites).encode()).hexdigest()
+    return not_modified(etag) or json_with_etag(sites, etag)
 
 
 # (Monitoring) Heartbeat check
@@ -614,29 +1840,57 @@ def heartbeat():
 
 
 # (Monitoring) Information of all available sites
+# ETag(= 내용 hash) 가 If-None-Match 와 같으면 304,
+# ?since=<version> 이면 {'version', 'full', 'sites'} 형식으로 그 뒤 바뀐 사이트만 돌려줍니다.
+# since 에 쓸 version token 은 X-Information-Version header 로도 보냅니다.
 @app.route('/information/all', methods=['GET'])
 @jwt_required()
 def get_all_information():
-    settings = load_settings()
-    auth_sites = set(user_auth_sites(get_jwt_identity().get('username')))
-    auth_settings = {key: settings[key] for key in settings.keys() if key in auth_sites}
-    return jsonify(auth_settings)
+    auth_sites = set(authorized_sites(get_jwt_identity()))
+    sites = [site for site in image_index.sites() if site in auth_sites]
+    information = current_site_information(sites)
+    versions = track_information(information)
+    version = information_version(versions)
+    etag = information_etag(information)
+    response = not_modified(etag)
+    if response is None:
+        since = request.args.get('since')
+        if since is None:
+            response = json_with_etag(information, etag)
+        else:
+            full, changed = information_changes(information, versions, version, since)
+            response = json_with_etag({'version': version, 'full': full, 'sites': changed}, etag)
+    response.headers['X-Information-Version'] = version
+    return response
 
 
 # (Monitoring) Information of the site
 @app.route('/information/<site>', methods=['GET'])
 @jwt_required()
 def get_site_information(site):
-    settings = load_settings()
     identity = get_jwt_identity()
+    if not image_index.has_site(site) or not check_site_access(identity, site):
+        return jsonify({"message": f"Site '{site}' not found"}), 404
 
-    if site not in settings:
+    information = current_site_information([site])
+    if site not in information:
         return jsonify({"message": f"Site '{site}' not found"}), 404
+    return jsonify(information[site])
 
-    if check_site_access(identity, site):
-        return jsonify(settings[site])
 
-    return jsonify({"message": f"Site '{site}' not found"}), 404
+# static/thumb_*.jpg 목록 캐시: static 폴더의 mtime 이 바뀔 때만 다시 나열합니다.
+thumbnail_listing = {'mtime_ns': None, 'files': frozenset()}
+
+
+def thumbnail_files():
+    mtime_ns = os.stat('static').st_mtime_ns
+    if thumbnail_listing['mtime_ns'] != mtime_ns:
+        with os.scandir('static') as entries:
+            files = frozenset(entry.name for entry in entries
+                              if entry.name.startswith('thumb_') and entry.name.endswith('.jpg'))
+        thumbnail_listing['files'] = files
+        thumbnail_listing['mtime_ns'] = mtime_ns
+    return thumbnail_listing['files']
 
 
 # (Monitoring) Thumbnails of Today's Photos from All Available Sites
@@ -644,10 +1898,9 @@ def get_site_information(site):
 @jwt_required()
 def get_thumbnails():
     # check user authorization
-    auth_sites = set(user_auth_sites(get_jwt_identity().get('username')))
-    thumbnail_files = glob('static/thumb_*.jpg')
+    auth_sites = set(authorized_sites(get_jwt_identity()))
     thumbnail_list = list()
-    for file in thumbnail_files:
+    for file in sorted(thumbnail_files()):
         site = os.path.basename(file).replace('thumb_', '').replace('.jpg', '')
         if site in auth_sites:
             thumbnail_url = os.path.basename(file)
@@ -657,6 +1910,67 @@ def get_thumbnails():
     return jsonify(thumbnail_list), 200
 
 
+def authorized_thumbnails(identity):
+    """허가된 사이트의 썸네일 (site, 파일 이름, 경로, stat) 목록 (파일 이름 순)."""
+    auth_sites = set(authorized_sites(identity))
+    thumbnails = []
+    for file in sorted(thumbnail_files()):
+        site = file.replace('thumb_', '').replace('.jpg', '')
+        if site not in auth_sites:
+            continue
+        path = os.path.join('static', file)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        thumbnails.append((site, file, path, stat))
+    return thumbnails
+
+
+def thumbnail_etag(stat):
+    # 썸네일은 임시 파일에서 rename 으로 교체되므로 inode 도 바뀝니다.
+    return f'{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+
+# (Monitoring) Thumbnail gallery: 허가된 사이트의 썸네일을 한 번의 요청으로 돌려줍니다.
+# ?format=json (기본, [{site, url, etag, data: base64}]) | multipart (multipart/mixed, 파일 이름 = url)
+# 썸네일이 하나도 바뀌지 않았으면 If-None-Match 로 304 를 받습니다.
+@app.route('/thumbnails/gallery', methods=['GET'])
+@jwt_required()
+def get_thumbnail_gallery():
+    output_format = request.args.get('format', 'json')
+    if output_format not in ('json', 'multipart'):
+        return jsonify({'message': 'format must be json or multipart.'}), 400
+
+    thumbnails = authorized_thumbnails(get_jwt_identity())
+    etag = hashlib.md5('\n'.join(f'{file}:{thumbnail_etag(stat)}'
+                                 for _, file, _, stat in thumbnails).encode()).hexdigest()
+    response = not_modified(etag)
+    if response is not None:
+        return response
+
+    if output_format == 'multipart':
+        boundary = hashlib.md5(f'{etag}{time.time()}'.encode()).hexdigest()
+        response = Response(stream_multipart([(file, path) for _, file, path, _ in thumbnails], boundary),
+                            content_type=f'multipart/mixed; boundary={boundary}')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    gallery = []
+    for site, file, path, stat in thumbnails:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            continue
+        gallery.append({'site': site,
+                        'url': file,
+                        'etag': thumbnail_etag(stat),
+                        'data': base64.b64encode(data).decode()})
+    return json_with_etag(gallery, etag)
+
+
 # (Monitoring) Static Image Authorization Check
 ALLOWED_PUBLIC_STATIC = {'monitor.jpg', 'no_image_today.jpg'}
 
@@ -668,10 +1982,8 @@ def get_thumbnail_image(file):
         return jsonify({"message": "Not found."}), 404
 
     token = request.headers.get('Authorization')
-    thumbnail_files = [os.path.basename(filename)
-                       for filename in glob('static/thumb_*.jpg')]
 
-    if token and file in thumbnail_files:
+    if token and file in thumbnail_files():
         try:
             verify_jwt_in_request()
         except Exception:
@@ -683,6 +1995,26 @@ def get_thumbnail_image(file):
     return jsonify({"message": "Not found."}), 404
 
 
+def recent_preview(site):
+    """사이트의 가장 최근 사진의 미리보기 (path, key, mtime). 사진이 없으면 None."""
+    # Find the most recent date folder from the image index
+    date_folders = image_index.dates(site)
+    if not date_folders:
+        return None
+    recent_date = date_folders[-1]
+
+    # Find the most recent image file based on the file name
+    image_files = indexed_jpgs(site, recent_date)
+    if not image_files:
+        return None
+    recent_image_file = os.path.join(os.getenv("IMAGES"), site, recent_date, image_files[-1])
+
+    try:
+        return ensure_preview(site, recent_image_file)
+    except FileNotFoundError:
+        return None
+
+
 # (Monitoring) Recent Images of a Site:
 @app.route('/images/<site>/recent', methods=['GET'])
 @jwt_required()
@@ -691,39 +2023,30 @@ def recent_image(site):
     if not check_site_access(identity, site):
         return jsonify({"message": "Not found."}), 404
 
-    # Define the path of the site
-    site_path = os.path.join(os.getenv("IMAGES"), site)
-
-    # Get the list of all date folders in the site
-    date_folders = glob(os.path.join(site_path, '????-??-??'))
-
-    # Filter out items that are not directories
-    date_folders = [folder for folder in date_folders if os.path.isdir(folder)]
-
-    if not date_folders:
-        return jsonify({"message": "No images available"}), 404
-
-    # Find the most recent date folder
-    recent_date_folder = max(date_folders, key=os.path.basename)
-
-    # Get the list of all image files in the recent date folder
-    image_files = glob(os.path.join(recent_date_folder, '*.jpg'))
-
-    if not image_files:
+    # Serve the cached preview (rendered once per new frame)
+    preview = recent_preview(site)
+    if preview is None:
         return jsonify({"message": "No images available"}), 404
+    preview_path, key, mtime = preview
+    return send_file(preview_path,
+                     mimetype='image/jpeg',
+                     etag=key,
+                     last_modified=datetime.fromtimestamp(mtime),
+                     conditional=True,
+                     max_age=0)
 
-    # Find the most recent image file based on the file name
-    recent_image_file = max(image_files, key=os.path.basename)
-
-    # Open, resize, and save the image to a BytesIO object
-    byte_io = io.BytesIO()
-    with Image.open(recent_image_file) as image:
-        image.thumbnail((1200, 1000))
-        image.save(byte_io, 'JPEG')
-    byte_io.seek(0)
 
-    # Send the BytesIO object as a file
-    return send_file(byte_io, mimetype='image/jpeg')
+def resolve_photo_path(site, date, photo):
+    """site/date/photo.jpg 경로를 검증해 반환합니다. 폴더 밖을 가리키거나 형식이 틀리면 None."""
+    if not re.fullmatch(r'\d{4}-\d{2}-\d{2}', date):
+        return None
+    base_dir = os.path.realpath(os.path.join(os.getenv('IMAGES'), site))
+    date_path = os.path.realpath(os.path.join(base_dir, date))
+    if not date_path.startswith(base_dir + os.sep):
+        return None
+    if not re.fullmatch(r'[\w\-]+', photo):
+        return None
+    return os.path.join(date_path, f'{photo}.jpg')
 
 
 # (Monitoring) Selected Time-Specific Photo of the Site:
@@ -734,29 +2057,23 @@ def get_single_image(site, date, photo):
     # check user authorization
     if not check_site_access(get_jwt_identity(), site):
         return jsonify({"message": "Not found."}), 404
-    if not re.fullmatch(r'\d{4}-\d{2}-\d{2}', date):
-        return jsonify({"message": "Not found."}), 404
-    base_dir = os.path.realpath(os.path.join(os.getenv('IMAGES'), site))
-    date_path = os.path.realpath(os.path.join(base_dir, date))
-    if not date_path.startswith(base_dir + os.sep):
-        return jsonify({"message": "Not found."}), 404
-    if not re.fullmatch(r'[\w\-]+', photo):
+    photo_path = resolve_photo_path(site, date, photo)
+    if photo_path is None:
         return jsonify({"message": "Not found."}), 404
-    file = f'{photo}.jpg'
-    return send_from_directory(date_path, file)
 
-    # # Open, resize, and save the image to a BytesIO object
-    # image = Image.open(os.path.join(os.getenv('IMAGES'),
-    #                                 site,
-    #                                 date,
-    #                                 f'{photo}.jpg'))
-    # image.thumbnail((1200, 1000))
-    # byte_io = io.BytesIO()
-    # image.save(byte_io, 'JPEG')
-    # byte_io.seek(0)
-
-    # # Send the BytesIO object as a file
-    # return send_file(byte_io, mimetype='image/jpeg')
+    # size=small|medium|large 이면 미리 만든 사본을 보냅니다 (없으면 지금 만듭니다).
+    size = request.args.get('size', 'original')
+    if size == 'original':
+        return send_from_directory(*os.path.split(photo_path))
+    if size not in PYRAMID_SIZES:
+        return jsonify({"message": f"size must be one of original, {', '.join(PYRAMID_SIZES)}"}), 400
+    try:
+        variant_path = ensure_photo_variant(site, date, photo, photo_path, size)
+    except FileNotFoundError:
+        return jsonify({"message": "Not found."}), 404
+    except ImageDecodeError:
+        return jsonify({"message": "Image could not be decoded."}), 415
+    return send_file(variant_path, mimetype='image/jpeg', conditional=True)
 
 
 # (Monitoring) Video list of Selected Site:
@@ -770,34 +2087,95 @@ def get_daily_video_list(site):
     try:
         all_files = os.listdir(os.path.join(os.getenv('IMAGES'), site, 'daily'))
     except Exception as e:
-        app.logger.error(f'Video list error for site {site}: {e}')
+        app.logger.error(f'Video list error for site {site}: {e}',
+                         extra={'event': 'video_list_error', 'site': site})
         return jsonify([]), 200
     allowed_exts = {'.mp4', '.gif'}
     video_list = sorted(f for f in all_files if os.path.splitext(f)[1].lower() in allowed_exts)
     return jsonify(video_list), 200
 
 
-# (Monitoring) Video of Selected Date:
-@app.route('/video/<site>/<video>')
-@jwt_required()
-def get_daily_video(site, video):
-    if not check_site_access(get_jwt_identity(), site):
-        return jsonify({"message": "Not found."}), 404
+# 앞단 웹 서버로 동영상 전송을 넘기는 모드: '' (Flask 가 직접 전송), 'x-sendfile', 'x-accel'
+VIDEO_SENDFILE_MODE = os.getenv('VIDEO_SENDFILE_MODE', '').lower()
+# X-Accel-Redirect 용 nginx internal location (IMAGES 폴더에 매핑)
+VIDEO_ACCEL_PREFIX = os.getenv('VIDEO_ACCEL_PREFIX', '/protected-images')
+
 
+def video_cache_control(site, video):
+    """
+    지난 날짜의 daily 영상은 immutable 로 캐시합니다.
+    timelapse 작업이 만든 영상은 늦게 올라온 사진으로 같은 이름에 다시 만들어질 수 있으므로
+    no-cache 로 두고 ETag 로 재검증합니다.
+    """
+    match = re.search(r'\d{4}-\d{2}-\d{2}', video)
+    if match and match.group(0) < datetime.now().strftime('%Y-%m-%d') \
+            and not os.path.exists(timelapse_state_path(site, match.group(0))):
+        return 'private, max-age=31536000, immutable'
+    return 'private, no-cache'
+
+
+def resolve_daily_video(site, video):
+    """<site>/daily/<video> 경로와 mimetype 을 검증해 반환합니다. 허용되지 않으면 None."""
     base_dir = os.path.realpath(os.path.join(os.getenv('IMAGES'), site, 'daily'))
     video_path = os.path.realpath(os.path.join(base_dir, video))
     if not video_path.startswith(base_dir + os.sep):
-        return jsonify({"message": "Not found."}), 404
+        return None
 
     ext = os.path.splitext(video_path)[1].lower()
     mime_map = {'.mp4': 'video/mp4', '.gif': 'image/gif'}
     if ext not in mime_map:
+        return None
+    return video_path, mime_map[ext]
+
+
+def file_etag(stat):
+    # strong ETag: 파일 크기 + mtime
+    return f'{stat.st_size:x}-{stat.st_mtime_ns:x}'
+
+
+# (Monitoring) Video of Selected Date:
+@app.route('/video/<site>/<video>')
+@jwt_required()
+def get_daily_video(site, video):
+    if not check_site_access(get_jwt_identity(), site):
+        return jsonify({"message": "Not found."}), 404
+
+    resolved = resolve_daily_video(site, video)
+    if resolved is None:
         return jsonify({"message": "Not found."}), 404
+    video_path, mimetype = resolved
 
     if not os.path.isfile(video_path):
         return jsonify({"message": "daily video not found"}), 404
 
-    return send_file(video_path, mimetype=mime_map[ext], as_attachment=False)
+    stat = os.stat(video_path)
+    etag = file_etag(stat)
+
+    if VIDEO_SENDFILE_MODE in ('x-sendfile', 'x-accel'):
+        # 파일 전송(Range 포함)은 앞단 웹 서버에 맡기고 worker 는 바로 반환
+        response = Response(mimetype=mimetype)
+        # 한글/공백이 든 이름도 header 에 넣을 수 있도록 URL 인코딩 (웹 서버가 다시 디코딩)
+        if VIDEO_SENDFILE_MODE == 'x-sendfile':
+            response.headers['X-Sendfile'] = quote(video_path)
+        else:
+            response.headers['X-Accel-Redirect'] = \
+                f'{VIDEO_ACCEL_PREFIX.rstrip("/")}/{quote(site)}/daily/{quote(os.path.basename(video_path))}'
+        response.set_etag(etag)
+        response.last_modified = datetime.fromtimestamp(stat.st_mtime)
+        response.make_conditional(request)
+    else:
+        response = send_file(video_path,
+                             mimetype=mimetype,
+                             as_attachment=False,
+                             conditional=True,
+                             etag=etag,
+                             last_modified=stat.st_mtime)
+        # 브라우저 플레이어가 seek 시 Range 요청을 쓰도록 알림
+        response.headers['Accept-Ranges'] = 'bytes'
+
+    response.headers['Cache-Control'] = video_cache_control(site, os.path.basename(video_path))
+    response.headers.pop('Expires', None)
+    return response
 
 
 # (Monitoring) List of Date Folders:
@@ -807,20 +2185,89 @@ def get_site_image_list_by_date(site):
     if not check_site_access(get_jwt_identity(), site):
         return jsonify({"message": "Not found."}), 404
 
-    # Define the path of the site
-    site_path = os.path.join(os.getenv("IMAGES"), site)
+    # Date folders from the image index, sorted descending (newest first)
+    date_list = image_index.dates(site)[::-1]
 
-    # Get the list of folders in the site
-    folder_list = glob(os.path.join(site_path, '????-??-??'))
+    # Return the date list
+    return jsonify(date_list), 200
 
-    # Filter out items that are not directories
-    folder_list = [folder for folder in folder_list if os.path.isdir(folder)]
 
-    # Extract the date part from each folder, sorted descending (newest first)
-    date_list = sorted([os.path.basename(folder) for folder in folder_list], reverse=True)
+# /images/<site>/<date> 페이지 크기
+PHOTO_PAGE_DEFAULT = 100
+PHOTO_PAGE_MAX = 2000
 
-    # Return the date list
-    return jsonify(date_list), 200
+
+def parse_hhmm(value):
+    """'HHMM' 문자열을 자정부터의 분으로 바꿉니다. 형식이 틀리면 None."""
+    if not isinstance(value, str) or not re.fullmatch(r'\d{4}', value):
+        return None
+    return int(value[:2]) * 60 + int(value[2:])
+
+
+def parse_time_range(params):
+    """from/to=HHMM (기본 0000~2359) 를 ((from 분, to 분), None) 으로, 틀리면 (None, 오류 메시지) 로 반환합니다."""
+    time_range = []
+    for key, default in (('from', '0000'), ('to', '2359')):
+        minutes = parse_hhmm(params.get(key, default))
+        if minutes is None:
+            return None, f'{key} must be HHMM.'
+        time_range.append(minutes)
+    return tuple(time_range), None
+
+
+def photo_minutes(photo, date):
+    """파일 이름에서 촬영 시각(분)을 읽습니다. 날짜 부분을 뺀 첫 HHMM 을 사용하고, 없으면 -1."""
+    name = os.path.splitext(photo)[0].replace(date, '').replace(date.replace('-', ''), '')
+    match = re.search(r'(\d{2})\D?(\d{2})', name)
+    if not match:
+        return -1
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+def nearest_photo_position(photos, date, minutes):
+    """시간순으로 정렬된 photos 에서 minutes 에 가장 가까운 사진의 위치를 이분 탐색으로 찾습니다."""
+    lo, hi = 0, len(photos)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if photo_minutes(photos[mid], date) < minutes:
+            lo = mid + 1
+        else:
+            hi = mid
+    if lo == len(photos):
+        return lo - 1
+    if lo > 0 and minutes - photo_minutes(photos[lo - 1], date) <= photo_minutes(photos[lo], date) - minutes:
+        return lo - 1
+    return lo
+
+
+def paginate_photos(photos, date, limit, after=None, before=None, at=None):
+    """
+    정렬된 photos 에서 한 페이지를 잘라냅니다.
+    after/before 는 파일 이름 cursor (해당 이름은 제외), at(분) 은 가장 가까운 사진을 가운데로 합니다.
+    """
+    start = bisect_right(photos, after) if after else 0
+    end = bisect_left(photos, before) if before else len(photos)
+    nearest = None
+
+    if at is not None and start < end:
+        position = nearest_photo_position(photos, date, at)
+        position = min(max(position, start), end - 1)
+        nearest = photos[position]
+        start = max(start, min(position - limit // 2, end - limit))
+        end = min(end, start + limit)
+    elif before and not after:
+        # before 만 있으면 cursor 바로 앞의 limit 개
+        start = max(start, end - limit)
+    else:
+        end = min(end, start + limit)
+
+    return {
+        'photos': list(photos[start:end]),
+        'nearest': nearest,
+        'has_before': start > 0,
+        'has_after': end < len(photos),
+        'total': len(photos),
+    }
 
 
 # (Monitoring) List of Photos by Date:
@@ -837,14 +2284,285 @@ def get_site_image_list_in_date(site, date):
     if not date_path.startswith(base_dir + os.sep):
         return jsonify({"message": "Not found."}), 404
 
-    # Get the list of image files in the date folder
-    image_files = glob(os.path.join(date_path, '*.jpg'))
+    # Get the list of image files in the date folder, sorted ascending
+    image_list = indexed_jpgs(site, date)
 
-    # Extract the filename from each image file, sorted ascending
-    image_list = sorted(os.path.basename(file) for file in image_files)
+    # Return the whole image list unless a page is requested
+    if not any(key in request.args for key in ('limit', 'after', 'before', 'at')):
+        return jsonify(image_list), 200
+
+    try:
+        limit = int(request.args.get('limit', PHOTO_PAGE_DEFAULT))
+    except ValueError:
+        return jsonify({'message': 'limit must be an integer.'}), 400
+    if limit < 1:
+        return jsonify({'message': 'limit must be greater than 0.'}), 400
+    limit = min(limit, PHOTO_PAGE_MAX)
+
+    at = request.args.get('at')
+    if at is not None:
+        at = parse_hhmm(at)
+        if at is None:
+            return jsonify({'message': 'at must be HHMM.'}), 400
+
+    return jsonify(paginate_photos(image_list, date, limit,
+                                   after=request.args.get('after'),
+                                   before=request.args.get('before'),
+                                   at=at)), 200
 
-    # Return the image list
-    return jsonify(image_list), 200
+
+def valid_date_folder(site, date):
+    return re.fullmatch(r'\d{4}-\d{2}-\d{2}', date) is not None \
+        and image_index.photos(site, date) is not None
+
+
+SPRITE_BUILDING_RESPONSE = ({"message": "Sprite is being built, try again shortly."}, 503, {'Retry-After': '5'})
+
+
+# (Monitoring) Offset map of the day's sprite sheets:
+# ?from=HHMM&to=HHMM 로 시간 범위의 사진만, 필요한 sheet 만 돌려줍니다.
+@app.route('/images/<site>/<date>/sprite.json', methods=['GET'])
+@jwt_required()
+def get_sprite_map(site, date):
+    if not check_site_access(get_jwt_identity(), site):
+        return jsonify({"message": "Not found."}), 404
+    if not valid_date_folder(site, date):
+        return jsonify({"message": "Not found."}), 404
+
+    time_range, error = parse_time_range(request.args)
+    if error:
+        return jsonify({'message': error}), 400
+
+    if not indexed_jpgs(site, date):
+        return jsonify({"message": "No images available"}), 404
+    sprite_map = current_sprite_map(site, date)
+    if sprite_map is None:
+        return SPRITE_BUILDING_RESPONSE
+
+    frames = []
+    sheets = []
+    for index, sheet in enumerate(sprite_map['sheets']):
+        sheet_frames = [{'photo': photo, 'sheet': index, 'x': x, 'y': y, 'w': w, 'h': h}
+                        for photo, (x, y, w, h) in zip(sheet['photos'], sheet['boxes'])
+                        if time_range[0] <= photo_minutes(photo, date) <= time_range[1]]
+        if not sheet_frames:
+            continue
+        frames.extend(sheet_frames)
+        sheets.append({'sheet': index,
+                       'url': f'/images/{site}/{date}/sprite/{index}?v={sheet["version"]}'})
+
+    return jsonify({'tile': sprite_map['tile'],
+                    'columns': sprite_map['columns'],
+                    'sheets': sheets,
+                    'frames': frames}), 200
+
+
+# (Monitoring) One sprite sheet JPEG of the day:
+@app.route('/images/<site>/<date>/sprite/<int:sheet>', methods=['GET'])
+@jwt_required()
+def get_sprite_sheet(site, date, sheet):
+    if not check_site_access(get_jwt_identity(), site):
+        return jsonify({"message": "Not found."}), 404
+    if not valid_date_folder(site, date):
+        return jsonify({"message": "Not found."}), 404
+
+    if not indexed_jpgs(site, date):
+        return jsonify({"message": "Not found."}), 404
+    sprite_map = current_sprite_map(site, date)
+    if sprite_map is None:
+        return SPRITE_BUILDING_RESPONSE
+    if sheet >= len(sprite_map['sheets']) or not os.path.exists(sprite_sheet_path(site, date, sheet)):
+        return jsonify({"message": "Not found."}), 404
+
+    # 지난 날짜의 sheet 는 바뀌지 않으므로 하루 동안 캐시, 오늘/어제는 ETag 로 재검증
+    max_age = 0 if date in image_index.hot_dates() else 86400
+    return send_file(sprite_sheet_path(site, date, sheet),
+                     mimetype='image/jpeg',
+                     conditional=True,
+                     max_age=max_age)
+
+
+def attachment_disposition(filename):
+    """
+    Content-Disposition 값. header 는 latin-1 만 보낼 수 있으므로 한글 등이 있는 이름은
+    ASCII 대체 이름과 RFC 5987 filename* 을 같이 보냅니다.
+    """
+    fallback = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+    fallback = fallback.replace('"', '').replace('\\', '')
+    if fallback == filename:
+        return f'attachment; filename="{filename}"'
+    return f'attachment; filename="{fallback}"; filename*=UTF-8\'\'{quote(filename, safe="")}'
+
+
+def batch_files(site, date, photos, size):
+    """(archive 안 이름, 경로) 를 차례로 돌려줍니다. size 사본은 보낼 차례에 (없으면) 만듭니다."""
+    for photo_file in photos:
+        photo = os.path.splitext(photo_file)[0]
+        source_path = os.path.join(os.getenv('IMAGES'), site, date, photo_file)
+        if size == 'original':
+            yield photo_file, source_path
+            continue
+        try:
+            yield f'{photo}_{size}.jpg', ensure_photo_variant(site, date, photo, source_path, size)
+        except (FileNotFoundError, ImageDecodeError):
+            continue
+
+
+# (Monitoring) Several photos of a date in one response:
+# photos=<이름,...> (POST 는 JSON 배열) 또는 from/to=HHMM 범위, format=zip|multipart, size=original|small|...
+@app.route('/images/<site>/<date>/batch', methods=['GET', 'POST'])
+@jwt_required()
+def get_batch_images(site, date):
+    identity = get_jwt_identity()
+    if not check_site_access(identity, site):
+        return jsonify({"message": "Not found."}), 404
+    if not valid_date_folder(site, date):
+        return jsonify({"message": "Not found."}), 404
+
+    params = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    if not isinstance(params, dict) and request.method == 'POST':
+        return jsonify({'message': 'Request body must be a JSON object.'}), 400
+    image_list = indexed_jpgs(site, date)
+
+    requested = params.get('photos')
+    if requested:
+        if isinstance(requested, str):
+            requested = requested.split(',')
+        if not isinstance(requested, list) or not all(isinstance(name, str) for name in requested):
+            return jsonify({'message': 'photos must be a list of photo names.'}), 400
+        available = set(image_list)
+        photos = []
+        missing = []
+        for name in dict.fromkeys(name.strip() for name in requested):
+            photo_file = name if name.endswith('.jpg') else f'{name}.jpg'
+            (photos if photo_file in available else missing).append(photo_file)
+        if missing:
+            return jsonify({"message": "Photos not found.", "missing": missing}), 404
+    elif 'from' in params or 'to' in params:
+        time_range, error = parse_time_range(params)
+        if error:
+            return jsonify({'message': error}), 400
+        photos = [photo for photo in image_list
+                  if time_range[0] <= photo_minutes(photo, date) <= time_range[1]]
+    else:
+        return jsonify({'message': 'photos or from/to is required.'}), 400
+
+    if len(photos) > PHOTO_PAGE_MAX:
+        return jsonify({'message': f'At most {PHOTO_PAGE_MAX} photos per request.'}), 400
+    size = params.get('size', 'original')
+    if not isinstance(size, str) or (size != 'original' and size not in PYRAMID_SIZES):
+        return jsonify({"message": f"size must be one of original, {', '.join(PYRAMID_SIZES)}"}), 400
+    output_format = params.get('format', 'zip')
+    if not isinstance(output_format, str) or output_format not in ('zip', 'multipart'):
+        return jsonify({'message': 'format must be zip or multipart.'}), 400
+
+    app.logger.info(f'Batch download: {site}/{date} {len(photos)} photos ({output_format}, {size}) '
+                    f'by {identity.get("username")}',
+                    extra={'event': 'batch_download', 'site': site, 'username': identity.get('username')})
+
+    files = batch_files(site, date, photos, size)
+    if output_format == 'zip':
+        return Response(stream_zip(files),
+                        mimetype='application/zip',
+                        headers={'Content-Disposition': attachment_disposition(f'{site}_{date}.zip')})
+    boundary = hashlib.md5(f'{site}{date}{time.time()}'.encode()).hexdigest()
+    return Response(stream_multipart(files, boundary),
+                    content_type=f'multipart/mixed; boundary={boundary}')
+
+
+def site_event_stream(identity, claims, cursor, resumed):
+    """
+    구독자의 허가된 사이트 event 를 SSE 형식으로 보냅니다.
+    허가 목록은 keepalive 주기마다 다시 확인하고, 토큰이 만료되면 stream 을 끝냅니다.
+    """
+    yield f'retry: {SSE_RETRY_MS}\n\n'.encode()
+    if not resumed:
+        # 이어받지 못했으므로 클라이언트가 /information/all 등을 다시 가져오도록 알림
+        yield format_event('reset', {})
+    sites = set(authorized_sites(identity, claims))
+    checked = time.monotonic()
+    while claims.get('exp') is None or time.time() < claims['exp']:
+        cursor, messages, lost = event_broker.read(cursor, sites)
+        if lost:
+            yield format_event('reset', {})
+        if messages:
+            yield b''.join(messages)
+        elif not event_broker.wait(cursor, SSE_KEEPALIVE_SECONDS):
+            yield KEEPALIVE
+        if time.monotonic() - checked >= SSE_KEEPALIVE_SECONDS:
+            sites = set(authorized_sites(identity, claims))
+            checked = time.monotonic()
+
+
+def acquire_subscriber():
+    acquired = event_broker.acquire()
+    SSE_SUBSCRIBERS.set(event_broker.subscribers)
+    return acquired
+
+
+def release_subscriber():
+    event_broker.release()
+    SSE_SUBSCRIBERS.set(event_broker.subscribers)
+
+
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+
+# (Monitoring) Live site events (Server-Sent Events):
+# event: frame  {site, date, photo, new, count} - 최근 날짜 폴더에 새 사진
+# event: status {site, ...사이트 정보}          - making_setting_json 에서 바뀐 사이트 정보
+# event: reset  {}                             - 놓친 event 가 있으니 전체를 다시 가져올 것
+# EventSource 는 header 를 못 붙이므로 ?jwt=<access token> 도 받습니다.
+@app.route('/events', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def get_site_events():
+    if not acquire_subscriber():
+        return jsonify({'message': 'Too many event subscribers.'}), 503
+    cursor, resumed = event_broker.start_cursor(request.headers.get('Last-Event-ID'))
+    stream = site_event_stream(get_jwt_identity(), dict(get_jwt()), cursor, resumed)
+    response = Response(stream, mimetype='text/event-stream', headers=SSE_HEADERS)
+    # 연결이 끊기거나 stream 이 끝나면 자리를 돌려줍니다.
+    response.call_on_close(release_subscriber)
+    return response
+
+
+# (Monitoring) Capture health history of the sites:
+# ?sites=a,b&since=ISO&until=ISO&resolution=raw|hour|day (기본: 최근 하루, 구간 길이에 맞는 해상도)
+@app.route('/health/history', methods=['GET'])
+@jwt_required()
+def get_site_health_history():
+    identity = get_jwt_identity()
+    sites = image_index.sites()
+    if not is_admin(identity):
+        auth_sites = set(authorized_sites(identity))
+        sites = [site for site in sites if site in auth_sites]
+    if request.args.get('sites'):
+        requested = set(request.args['sites'].split(','))
+        sites = [site for site in sites if site in requested]
+
+    try:
+        until = datetime.fromisoformat(request.args['until']) if request.args.get('until') else datetime.now()
+        since = datetime.fromisoformat(request.args['since']) if request.args.get('since') \
+            else until - timedelta(days=1)
+    except ValueError:
+        return jsonify({'message': 'since and until must be ISO 8601 datetimes.'}), 400
+    since_ts, until_ts = int(since.timestamp()), int(until.timestamp())
+    if since_ts > until_ts:
+        return jsonify({'message': 'since must be before until.'}), 400
+
+    resolution = request.args.get('resolution') or default_resolution(since_ts, until_ts)
+    if resolution not in HEALTH_RESOLUTIONS:
+        return jsonify({'message': f"Invalid resolution. Use one of {list(HEALTH_RESOLUTIONS)}."}), 400
+
+    try:
+        series = health_store.query(sites, since_ts, until_ts, resolution)
+    except sqlite3.Error as e:
+        app.logger.error(f'Site health query failed: {e}', extra={'event': 'site_health'})
+        return jsonify({'message': 'Site health history is not available.'}), 503
+    return jsonify({'resolution': resolution,
+                    'since': since_ts,
+                    'until': until_ts,
+                    'sites': series}), 200
 
 
 @app.route('/logs', methods=['GET'])
@@ -871,6 +2589,34 @@ def get_logs():
     # 과도한 요청 제한
     page_size = min(page_size, 500)
 
+    # 필터가 있으면 최신순으로 훑으며 페이지가 차면 멈춥니다 (total 대신 has_more)
+    filter_keys = ('level', 'event', 'site', 'username', 'since', 'until', 'q')
+    filters = {key: request.args[key] for key in filter_keys if request.args.get(key)}
+    if filters:
+        if 'level' in filters:
+            filters['level'] = filters['level'].upper()
+            if filters['level'] not in LEVELS:
+                return jsonify({'message': f"Invalid level. Use one of {list(LEVELS)}."}), 400
+        try:
+            for key in ('since', 'until'):
+                if key in filters:
+                    value = datetime.fromisoformat(filters[key])
+                    # 로그 시각은 서버 현지 시각(naive)이므로 offset 이 있는 값은 현지 시각으로 바꿉니다.
+                    if value.tzinfo is not None:
+                        value = value.astimezone().replace(tzinfo=None)
+                    filters[key] = value
+        except ValueError:
+            return jsonify({'message': 'since and until must be ISO 8601 datetimes.'}), 400
+
+        logs = read_filtered_logs(log_type, page, page_size, filters)
+        return jsonify({
+            'type': log_type,
+            'page': page,
+            'page_size': page_size,
+            'has_more': logs['has_more'],
+            'logs': logs['logs']
+        }), 200
+
     logs = read_paginated_logs(log_type, page, page_size)
 
     return jsonify({
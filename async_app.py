@@ -0,0 +1,280 @@
+"""
+이미지/동영상/썸네일 파일 전송용 ASGI 진입점 (운영용).
+
+/images/<site>/recent, /images/<site>/<date>/<photo>, /video/<site>/<video>, /static/<file> 은
+event loop 에서 non-blocking 으로 전송하고, /events (SSE) 는 구독자마다 thread 를 잡지 않도록 event loop 에서 기다립니다.
+나머지 API 는 같은 프로세스의 Flask app 으로 넘깁니다.
+인증/권한 확인은 app.py 의 helper 를 그대로 사용합니다.
+
+    pip install -r requirements-async.txt
+    uvicorn async_app:app --host 0.0.0.0 --port 3000 --workers 1
+
+worker 는 1개로 실행합니다. 각 worker 가 app.py 를 import 하면서 scheduler 작업(썸네일/사본/timelapse 생성,
+연결 probe)을 모두 따로 돌리게 되고, 정보 ETag/since version, SSE Last-Event-ID, 권한 캐시 같은
+프로세스 메모리 상태도 worker 마다 달라집니다. 파일 전송은 event loop 가, CPU 작업은 process pool 이
+나눠 처리하므로 worker 1개로도 여러 코어를 씁니다.
+"""
+import os
+import stat as stat_module
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from functools import wraps
+
+from a2wsgi import WSGIMiddleware
+from flask_jwt_extended import decode_token
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+import app as api
+from fs_index import IndexNotReady
+from events import KEEPALIVE, format_event
+from metrics import HTTP_REQUEST_SECONDS
+
+NOT_FOUND = {"message": "Not found."}
+
+# app.py 의 Flask-CORS 설정과 같은 origin 목록 (preflight OPTIONS 는 Flask 쪽에서 응답)
+CORS_ORIGINS = {origin for origin in (os.getenv('FRONT_DEV'), os.getenv('FRONT_PRD')) if origin}
+
+
+def with_cors(handler):
+    @wraps(handler)
+    async def wrapper(request):
+        response = await handler(request)
+        origin = request.headers.get('Origin')
+        if origin in CORS_ORIGINS:
+            response.headers['Access-Control-Allow-Origin'] = origin
+            response.headers['Vary'] = 'Origin'
+        return response
+    return wrapper
+
+
+def timed_route(route):
+    """Flask 쪽과 같은 route 이름으로 요청 처리 시간을 기록합니다 (파일 전송 시작 전까지)."""
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(request):
+            started = time.perf_counter()
+            response = await handler(request)
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                         route=route, method=request.method,
+                                         status=response.status_code)
+            return response
+        return wrapper
+    return decorator
+
+
+def not_found(message=None):
+    return JSONResponse({"message": message} if message else NOT_FOUND, status_code=404)
+
+
+def not_modified(request, etag, mtime):
+    """If-None-Match (있으면) 또는 If-Modified-Since 로 클라이언트의 사본이 최신인지 확인합니다."""
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return etag in tags or '*' in tags
+    if_modified_since = request.headers.get('If-Modified-Since')
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def send_file(request, path, media_type):
+    """Flask 의 send_file(conditional=True) 처럼 ETag/Last-Modified 를 붙이고 조건부 요청이면 304 로 답합니다."""
+    try:
+        stat = await run_in_threadpool(os.stat, path)
+    except OSError:
+        return not_found()
+    if not stat_module.S_ISREG(stat.st_mode):
+        return not_found()
+    etag = f'"{api.file_etag(stat)}"'
+    headers = {'ETag': etag,
+               'Last-Modified': formatdate(stat.st_mtime, usegmt=True),
+               'Cache-Control': 'no-cache'}
+    if not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat)
+
+
+def request_identity(request, allow_query=False):
+    """
+    Authorization: Bearer 토큰을 검증하여 (identity, claims) 를 반환합니다. 실패하면 (None, None).
+    allow_query 이면 header 가 없을 때 ?jwt=<token> 을 씁니다 (EventSource 용).
+    """
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        token = header[len('Bearer '):]
+    elif allow_query and request.query_params.get('jwt'):
+        token = request.query_params['jwt']
+    else:
+        return None, None
+    try:
+        with api.app.app_context():
+            claims = decode_token(token)
+    except Exception:
+        return None, None
+    return claims.get(api.app.config['JWT_IDENTITY_CLAIM']), claims
+
+
+async def has_site_access(request, site):
+    identity, claims = request_identity(request)
+    if not identity:
+        return False
+    # MongoDB 조회가 있을 수 있으므로 thread pool 에서 실행
+    return await run_in_threadpool(api.check_site_access, identity, site, claims)
+
+
+@timed_route('/images/<site>/recent')
+@with_cors
+async def recent_image(request):
+    site = request.path_params['site']
+    if not await has_site_access(request, site):
+        return not_found()
+
+    preview = await run_in_threadpool(api.recent_preview, site)
+    if preview is None:
+        return not_found('No images available')
+    preview_path, key, mtime = preview
+
+    etag = f'"{key}"'
+    headers = {'ETag': etag,
+               'Last-Modified': formatdate(mtime, usegmt=True),
+               'Cache-Control': 'no-cache'}
+    if not_modified(request, etag, mtime):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(preview_path, media_type='image/jpeg', headers=headers)
+
+
+@timed_route('/images/<site>/<date>/<photo>')
+@with_cors
+async def get_single_image(request):
+    site = request.path_params['site']
+    if not await has_site_access(request, site):
+        return not_found()
+
+    date, photo = request.path_params['date'], request.path_params['photo']
+    # realpath 가 스토리지를 lstat 하므로 thread pool 에서 실행
+    photo_path = await run_in_threadpool(api.resolve_photo_path, site, date, photo)
+    if photo_path is None:
+        return not_found()
+
+    size = request.query_params.get('size', 'original')
+    if size == 'original':
+        return await send_file(request, photo_path, 'image/jpeg')
+    if size not in api.PYRAMID_SIZES:
+        return JSONResponse({"message": f"size must be one of original, {', '.join(api.PYRAMID_SIZES)}"},
+                            status_code=400)
+    try:
+        # 사본이 없으면 PIL 로 만들어야 하므로 thread pool 에서 실행
+        variant_path = await run_in_threadpool(api.ensure_photo_variant, site, date, photo, photo_path, size)
+    except FileNotFoundError:
+        return not_found()
+    except api.ImageDecodeError:
+        return JSONResponse({"message": "Image could not be decoded."}, status_code=415)
+    return await send_file(request, variant_path, 'image/jpeg')
+
+
+@timed_route('/video/<site>/<video>')
+@with_cors
+async def get_daily_video(request):
+    site = request.path_params['site']
+    if not await has_site_access(request, site):
+        return not_found()
+
+    resolved = await run_in_threadpool(api.resolve_daily_video, site, request.path_params['video'])
+    if resolved is None:
+        return not_found()
+    video_path, mimetype = resolved
+
+    try:
+        stat = await run_in_threadpool(os.stat, video_path)
+    except OSError:
+        return not_found('daily video not found')
+
+    etag = f'"{api.file_etag(stat)}"'
+    headers = {'ETag': etag,
+               'Cache-Control': api.video_cache_control(site, os.path.basename(video_path))}
+    if not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+    # FileResponse 가 Range(206) 와 If-Range 를 처리합니다.
+    return FileResponse(video_path, media_type=mimetype, headers=headers, stat_result=stat)
+
+
+@timed_route('/static/<file>')
+@with_cors
+async def get_static_file(request):
+    file = request.path_params['file']
+    if "thumb_" not in file:
+        if file in api.ALLOWED_PUBLIC_STATIC:
+            return await send_file(request, os.path.join('static', file), None)
+        return not_found()
+
+    if file not in await run_in_threadpool(api.thumbnail_files):
+        return not_found()
+    site = file.replace('thumb_', '').split('.')[0]
+    if not await has_site_access(request, site):
+        return not_found()
+    return await send_file(request, os.path.join('static', file), 'image/jpeg')
+
+
+async def site_event_stream(identity, claims, cursor, resumed):
+    """app.site_event_stream 과 같은 내용을 event loop 에서 보냅니다."""
+    broker = api.event_broker
+    try:
+        yield f'retry: {api.SSE_RETRY_MS}\n\n'.encode()
+        if not resumed:
+            yield format_event('reset', {})
+        sites = set(await run_in_threadpool(api.authorized_sites, identity, claims))
+        checked = time.monotonic()
+        while claims.get('exp') is None or time.time() < claims['exp']:
+            cursor, messages, lost = broker.read(cursor, sites)
+            if lost:
+                yield format_event('reset', {})
+            if messages:
+                yield b''.join(messages)
+            elif not await broker.wait_async(cursor, api.SSE_KEEPALIVE_SECONDS):
+                yield KEEPALIVE
+            if time.monotonic() - checked >= api.SSE_KEEPALIVE_SECONDS:
+                sites = set(await run_in_threadpool(api.authorized_sites, identity, claims))
+                checked = time.monotonic()
+    finally:
+        api.release_subscriber()
+
+
+@timed_route('/events')
+@with_cors
+async def get_site_events(request):
+    identity, claims = request_identity(request, allow_query=True)
+    if not identity:
+        return JSONResponse({"msg": "Missing or invalid token"}, status_code=401)
+    if not api.acquire_subscriber():
+        return JSONResponse({'message': 'Too many event subscribers.'}, status_code=503)
+    cursor, resumed = api.event_broker.start_cursor(request.headers.get('Last-Event-ID'))
+    return StreamingResponse(site_event_stream(identity, claims, cursor, resumed),
+                             media_type='text/event-stream', headers=api.SSE_HEADERS)
+
+
+async def index_not_ready(request, exc):
+    return JSONResponse({'message': 'Image index is loading, try again shortly.'},
+                        status_code=503, headers={'Retry-After': '10'})
+
+
+flask_app = WSGIMiddleware(api.app)
+
+app = Starlette(routes=[
+    Route('/images/{site}/recent', recent_image, methods=['GET']),
+    # sprite.json, batch 가 {photo} 에 잡히지 않도록 먼저 Flask 로 넘깁니다.
+    Route('/images/{site}/{date}/sprite.json', flask_app),
+    Route('/images/{site}/{date}/batch', flask_app),
+    Route('/images/{site}/{date}/{photo}', get_single_image, methods=['GET']),
+    Route('/video/{site}/{video}', get_daily_video, methods=['GET']),
+    Route('/static/{file}', get_static_file, methods=['GET']),
+    Route('/events', get_site_events, methods=['GET']),
+    # 그 외 API 는 기존 Flask app 이 처리
+    Mount('/', flask_app),
+], exception_handlers={IndexNotReady: index_not_ready})
@@ -0,0 +1,228 @@
+"""
+모니터링 API 벤치마크.
+
+합성 IMAGES 트리(사이트 N x 날짜 D x 프레임 F)를 임시 폴더에 만들고, MongoDB 대신 mongomock 을 붙여
+스케줄러 작업과 주요 endpoint 를 반복 호출합니다. 작업/endpoint 별 p50/p95/p99 지연 시간, 처리량,
+단계별 peak RSS 를 JSON 으로 출력하므로 릴리스 간 결과를 diff 할 수 있습니다.
+
+    pip install mongomock
+    python benchmarks/bench_api.py --sites 50 --days 3 --frames 144 --output bench.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import platform
+from datetime import datetime, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from PIL import Image  # noqa: E402
+
+PASSWORD = 'bench-password'
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 는 KB, macOS 는 byte 단위
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def percentile(sorted_values, ratio):
+    index = min(len(sorted_values) - 1, int(round(ratio * (len(sorted_values) - 1))))
+    return round(sorted_values[index] * 1000, 3)
+
+
+def summarize(latencies):
+    latencies = sorted(latencies)
+    total = sum(latencies)
+    return {
+        'count': len(latencies),
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'throughput_per_s': round(len(latencies) / total, 1) if total else None,
+    }
+
+
+def synthetic_frame(width, height, seed):
+    """실제 카메라 프레임과 비슷한 크기가 되도록 노이즈 + 그라데이션 JPEG 을 만듭니다."""
+    noise = Image.effect_noise((width, height), 40 + seed % 30).convert('RGB')
+    gradient = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    frame = Image.blend(noise, gradient, 0.5)
+    byte_io = io.BytesIO()
+    frame.save(byte_io, 'JPEG', quality=90)
+    return byte_io.getvalue()
+
+
+def build_tree(root, sites, days, frames, width, height):
+    """
+    <root>/site_XXX/{setting/settings.txt, YYYY-MM-DD/YYYY-MM-DD_HHMM.jpg, daily/} 를 만듭니다.
+    같은 사이트의 프레임은 같은 JPEG 바이트를 복사해 생성 시간을 줄입니다.
+    """
+    interval = max(1, 1440 // frames)
+    today = datetime.now()
+    total_bytes = 0
+    for i in range(sites):
+        site = f'site_{i:03d}'
+        os.makedirs(os.path.join(root, site, 'setting'))
+        os.makedirs(os.path.join(root, site, 'daily'))
+        with open(os.path.join(root, site, 'setting', 'settings.txt'), 'w') as f:
+            f.write(f'time_start="0000"\ntime_end="2359"\ntime_interval="{interval}"\n'
+                    f'device_number="bmotion{i}"\n')
+        frame = synthetic_frame(width, height, i)
+        for d in range(days):
+            date = (today - timedelta(days=d)).strftime('%Y-%m-%d')
+            date_dir = os.path.join(root, site, date)
+            os.makedirs(date_dir)
+            for n in range(frames):
+                minutes = n * interval
+                with open(os.path.join(date_dir, f'{date}_{minutes // 60:02d}{minutes % 60:02d}.jpg'), 'wb') as f:
+                    f.write(frame)
+                total_bytes += len(frame)
+    return total_bytes
+
+
+def time_calls(func, repeat):
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=20)
+    parser.add_argument('--days', type=int, default=2)
+    parser.add_argument('--frames', type=int, default=144, help='frames per day')
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--job-runs', type=int, default=3, help='runs per scheduler job')
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args()
+
+    import mongomock
+    from werkzeug.security import generate_password_hash
+
+    work_dir = tempfile.mkdtemp(prefix='bmwebm-bench-')
+    results = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'params': vars(args),
+        'rss_mb': {},
+        'jobs': {},
+        'endpoints': {},
+    }
+    try:
+        images_dir = os.path.join(work_dir, 'images')
+        started = time.perf_counter()
+        results['tree_bytes'] = build_tree(images_dir, args.sites, args.days, args.frames,
+                                           args.width, args.height)
+        results['tree_build_s'] = round(time.perf_counter() - started, 2)
+
+        # app.py 는 log/, static/, settings.json 을 현재 폴더 기준으로 씁니다.
+        os.chdir(work_dir)
+        os.makedirs('static')
+        Image.new('RGB', (300, 200), 'gray').save(os.path.join('static', 'no_image_today.jpg'))
+        os.environ.update({
+            'IMAGES': images_dir,
+            'JWT_SECRET_KEY': 'bench-secret',
+            'JWT_EXP_DAY': '1',
+            'MONGO_URI': 'mongodb://localhost:27017/bench',
+            'FRONT_DEV': 'http://localhost',
+            'FRONT_PRD': 'http://localhost',
+        })
+        results['rss_mb']['before_import'] = peak_rss_mb()
+
+        import app as api
+        # 벤치마크 중에는 작업을 직접 호출합니다.
+        api.scheduler.shutdown(wait=False)
+        # static/ 을 send_from_directory 가 app.root_path 기준으로 찾으므로 작업 폴더로 맞춥니다.
+        api.app.root_path = work_dir
+        api.mongo.db = mongomock.MongoClient().db
+        sites = [f'site_{i:03d}' for i in range(args.sites)]
+        for username, user_class in (('bench-admin', 'bmotion'), ('bench-user', 'user')):
+            api.mongo.db.users.insert_one({'username': username,
+                                           'password': generate_password_hash(PASSWORD),
+                                           'class': user_class,
+                                           'sites': sites,
+                                           'activate': True})
+        api.image_index.ready.wait()
+        results['rss_mb']['after_index'] = peak_rss_mb()
+
+        # -- scheduler jobs -------------------------------------------------
+        for job in (api.making_thumbnails, api.making_setting_json):
+            latencies = time_calls(job, args.job_runs)
+            results['jobs'][job.__name__] = dict(summarize(latencies),
+                                                 first_run_ms=round(latencies[0] * 1000, 3))
+        results['rss_mb']['after_jobs'] = peak_rss_mb()
+
+        # -- endpoints ------------------------------------------------------
+        client = api.app.test_client()
+
+        def token(username):
+            response = client.post('/login', json={'username': username, 'password': PASSWORD})
+            return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+        user_headers = token('bench-user')
+        admin_headers = token('bench-admin')
+        site = sites[0]
+        today = datetime.now().strftime('%Y-%m-%d')
+        photos = client.get(f'/images/{site}/{today}', headers=user_headers).get_json()
+        photo = os.path.splitext(photos[len(photos) // 2])[0]
+        information_response = client.get('/information/all', headers=user_headers)
+        information_etag = information_response.headers['ETag']
+        information_version = information_response.headers['X-Information-Version']
+
+        endpoints = {
+            'sites_all': ('/sites/all', user_headers),
+            'information_all': ('/information/all', user_headers),
+            'information_all_not_modified': ('/information/all',
+                                             dict(user_headers, **{'If-None-Match': information_etag})),
+            'information_all_since': (f'/information/all?since={information_version}', user_headers),
+            'information_site': (f'/information/{site}', user_headers),
+            'thumbnails': ('/thumbnails', user_headers),
+            'thumbnail_gallery': ('/thumbnails/gallery', user_headers),
+            'thumbnail_gallery_multipart': ('/thumbnails/gallery?format=multipart', user_headers),
+            'thumbnail_image': (f'/static/thumb_{site}.jpg', user_headers),
+            'date_list': (f'/images/{site}', user_headers),
+            'photo_list': (f'/images/{site}/{today}', user_headers),
+            'photo_page': (f'/images/{site}/{today}?limit=50&at=1200', user_headers),
+            'recent_image': (f'/images/{site}/recent', user_headers),
+            'single_image': (f'/images/{site}/{today}/{photo}', user_headers),
+            'logs': ('/logs?page=1&page_size=50', admin_headers),
+        }
+        for name, (path, headers) in endpoints.items():
+            status = {}
+
+            def call():
+                response = client.get(path, headers=headers)
+                response.get_data()
+                status[response.status_code] = status.get(response.status_code, 0) + 1
+
+            results['endpoints'][name] = dict(summarize(time_calls(call, args.requests)),
+                                              path=path, status=status)
+        results['rss_mb']['after_endpoints'] = peak_rss_mb()
+    finally:
+        os.chdir(REPO_DIR)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = json.dumps(results, indent=4, default=str)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+썸네일/미리보기 리사이즈 micro-benchmark.
+
+기존 방식(Image.open + thumbnail + 기본 저장)과 imaging.resize_image(draft 디코딩)를
+프레임당 ms 와 peak RSS 로 비교합니다. 각 방식은 별도 프로세스에서 실행되어
+peak RSS 가 서로 섞이지 않습니다.
+
+    python benchmarks/bench_imaging.py                # 합성 12MP 프레임 사용
+    python benchmarks/bench_imaging.py --images DIR   # 실제 프레임 사용
+"""
+import io
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image  # noqa: E402
+from imaging import resize_image, THUMBNAIL_SIZE, PREVIEW_SIZE  # noqa: E402
+
+
+def make_frames(directory, count, width, height):
+    frames = []
+    for i in range(count):
+        path = os.path.join(directory, f'frame_{i:03d}.jpg')
+        Image.effect_noise((width, height), 64 + i).convert('RGB').save(path, 'JPEG', quality=90)
+        frames.append(path)
+    return frames
+
+
+def before(path, size):
+    byte_io = io.BytesIO()
+    with Image.open(path) as img:
+        img.thumbnail(size)
+        img.save(byte_io, 'JPEG')
+
+
+def after(path, size):
+    resize_image(path, io.BytesIO(), size)
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 는 KB, macOS 는 byte 단위
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run(mode, frames, size, repeat, queue):
+    func = before if mode == 'before' else after
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for path in frames:
+            func(path, size)
+    elapsed = time.perf_counter() - start
+    queue.put({'mode': mode,
+               'size': list(size),
+               'ms_per_frame': round(elapsed * 1000 / (len(frames) * repeat), 2),
+               'peak_rss_mb': round(peak_rss_mb(), 1)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', help='directory of source JPEG frames')
+    parser.add_argument('--frames', type=int, default=10, help='number of synthetic frames')
+    parser.add_argument('--width', type=int, default=4000)
+    parser.add_argument('--height', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.images:
+            frames = sorted(glob.glob(os.path.join(args.images, '*.jpg')))
+        else:
+            frames = make_frames(tmp_dir, args.frames, args.width, args.height)
+        if not frames:
+            parser.error('no frames found')
+
+        results = []
+        for size in (THUMBNAIL_SIZE, PREVIEW_SIZE):
+            for mode in ('before', 'after'):
+                queue = multiprocessing.Queue()
+                process = multiprocessing.Process(
+                    target=run, args=(mode, frames, size, args.repeat, queue))
+                process.start()
+                results.append(queue.get())
+                process.join()
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
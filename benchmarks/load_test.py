@@ -0,0 +1,127 @@
+"""
+동시 시청자(concurrent viewer) 부하 테스트.
+
+여러 서버(예: 기존 Flask 개발 서버와 async_app)를 같은 요청 목록으로 차례로 두드려
+동시 접속 수별 처리량(req/s)과 지연 시간(p50/p95/p99)을 JSON 으로 출력합니다.
+
+    python app.py                                          # sync:  localhost:3000
+    uvicorn async_app:app --port 3001 --workers 1         # async: localhost:3001
+    python benchmarks/load_test.py --username admin --password ... --site site1 \\
+        --target sync=http://localhost:3000 --target async=http://localhost:3001 \\
+        --concurrency 1 10 50 --duration 10
+"""
+import json
+import time
+import argparse
+import threading
+import http.client
+from datetime import datetime
+from urllib.parse import urlsplit
+
+
+def login(base_url, username, password):
+    parts = urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    body = json.dumps({'username': username, 'password': password})
+    connection.request('POST', '/login', body, {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    data = json.loads(response.read())
+    if response.status != 200:
+        raise SystemExit(f'login failed on {base_url}: {data}')
+    return data['access_token']
+
+
+def default_paths(site, date, photo):
+    paths = [f'/images/{site}/recent', f'/static/thumb_{site}.jpg']
+    if date and photo:
+        paths.append(f'/images/{site}/{date}/{photo}')
+    return paths
+
+
+def percentile(sorted_values, ratio):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(ratio * (len(sorted_values) - 1))))
+    return round(sorted_values[index] * 1000, 2)
+
+
+def viewer(base_url, token, paths, deadline, latencies, errors, lock):
+    """한 명의 시청자: keep-alive 연결 하나로 paths 를 돌아가며 요청합니다."""
+    parts = urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    headers = {'Authorization': f'Bearer {token}'}
+    local_latencies = []
+    local_errors = 0
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                local_errors += 1
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+            continue
+        local_latencies.append(time.perf_counter() - started)
+    connection.close()
+    with lock:
+        latencies.extend(local_latencies)
+        errors.append(local_errors)
+
+
+def run(base_url, token, paths, concurrency, duration):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=viewer,
+                                args=(base_url, token, paths, deadline, latencies, errors, lock))
+               for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'throughput_rps': round(len(latencies) / duration, 1),
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', action='append', required=True, help='NAME=BASE_URL (repeatable)')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--site', required=True)
+    parser.add_argument('--date', default=datetime.now().strftime('%Y-%m-%d'))
+    parser.add_argument('--photo', help='photo name without .jpg for /images/<site>/<date>/<photo>')
+    parser.add_argument('--path', action='append', help='custom request path (repeatable, overrides defaults)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    paths = args.path or default_paths(args.site, args.date, args.photo)
+    results = {'paths': paths, 'duration': args.duration, 'targets': {}}
+    for target in args.target:
+        name, _, base_url = target.partition('=')
+        token = login(base_url, args.username, args.password)
+        results['targets'][name] = [run(base_url, token, paths, concurrency, args.duration)
+                                    for concurrency in args.concurrency]
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
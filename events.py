@@ -0,0 +1,123 @@
+"""
+Server-Sent Events 용 프로세스 내부 event broker.
+
+event 는 발행할 때 한 번만 SSE 형식 bytes 로 만들어 크기가 정해진 ring buffer 에 넣습니다.
+구독자는 마지막으로 읽은 sequence 번호만 가지므로 구독자가 늘어도 event 를 복사하지 않습니다.
+thread 구독자(Flask)는 threading.Condition 으로, ASGI 구독자는 event loop 마다 하나인 asyncio.Event 로 깨웁니다.
+"""
+import os
+import json
+import asyncio
+import threading
+from collections import deque
+from itertools import islice
+
+KEEPALIVE = b': keepalive\n\n'
+
+
+def format_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    # json.dumps 는 줄바꿈 없이 한 줄로 만듭니다.
+    lines.append(f'data: {json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)}')
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+class EventBroker:
+    def __init__(self, capacity=1024, max_subscribers=500):
+        # event id 는 '<epoch>.<seq>' 이므로 다른 프로세스의 Last-Event-ID 는 이어받지 않습니다.
+        self.epoch = os.urandom(4).hex()
+        self.events = deque(maxlen=capacity)  # (seq, site, message bytes)
+        self.last_seq = 0
+        self.condition = threading.Condition()
+        # 기다리는 구독자가 있는 event loop -> asyncio.Event (깨우면 지우고, 다음 구독자가 새로 만듭니다)
+        self.loop_wakers = {}
+        self.max_subscribers = max_subscribers
+        self.subscribers = 0
+
+    # -- 발행 ---------------------------------------------------------------
+
+    def publish(self, event, site, data):
+        with self.condition:
+            self.last_seq += 1
+            message = format_event(event, data, f'{self.epoch}.{self.last_seq}')
+            self.events.append((self.last_seq, site, message))
+            self.condition.notify_all()
+            loops = list(self.loop_wakers)
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self.wake_loop, loop)
+            except RuntimeError:
+                # 닫힌 event loop
+                with self.condition:
+                    self.loop_wakers.pop(loop, None)
+
+    def wake_loop(self, loop):
+        with self.condition:
+            waker = self.loop_wakers.pop(loop, None)
+        if waker is not None:
+            waker.set()
+
+    # -- 구독 ---------------------------------------------------------------
+
+    def acquire(self):
+        """구독자 자리를 얻습니다. max_subscribers 를 넘으면 False."""
+        with self.condition:
+            if self.subscribers >= self.max_subscribers:
+                return False
+            self.subscribers += 1
+            return True
+
+    def release(self):
+        with self.condition:
+            self.subscribers -= 1
+
+    def start_cursor(self, last_event_id=None):
+        """
+        (cursor, resumed) 를 반환합니다. Last-Event-ID 가 이 프로세스의 것이고 아직 buffer 에 있으면
+        그 뒤부터 이어서 보내고, 아니면 현재 위치부터 보냅니다 (resumed=False).
+        """
+        with self.condition:
+            epoch, _, seq = (last_event_id or '').partition('.')
+            if epoch == self.epoch and seq.isdigit():
+                cursor = int(seq)
+                first = self.events[0][0] if self.events else self.last_seq + 1
+                if first - 1 <= cursor <= self.last_seq:
+                    return cursor, True
+            return self.last_seq, False
+
+    def read(self, cursor, sites=None):
+        """
+        cursor 이후 event 중 sites (None 이면 전부) 에 속한 message 들.
+        (새 cursor, messages, buffer 가 넘쳐 놓친 event 가 있는지) 를 반환합니다.
+        """
+        with self.condition:
+            last_seq = self.last_seq
+            if cursor >= last_seq:
+                return last_seq, [], False
+            first = self.events[0][0]
+            messages = [message for _, site, message in islice(self.events, max(0, cursor + 1 - first), None)
+                        if sites is None or site in sites]
+        return last_seq, messages, cursor + 1 < first
+
+    def wait(self, cursor, timeout):
+        """cursor 뒤에 event 가 생길 때까지 최대 timeout 초 기다립니다 (thread 용)."""
+        with self.condition:
+            return self.condition.wait_for(lambda: self.last_seq > cursor, timeout)
+
+    async def wait_async(self, cursor, timeout):
+        """cursor 뒤에 event 가 생길 때까지 최대 timeout 초 기다립니다 (event loop 용)."""
+        loop = asyncio.get_running_loop()
+        with self.condition:
+            if self.last_seq > cursor:
+                return True
+            waker = self.loop_wakers.get(loop)
+            if waker is None:
+                waker = self.loop_wakers[loop] = asyncio.Event()
+        try:
+            await asyncio.wait_for(waker.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
@@ -0,0 +1,387 @@
+import os
+import re
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from metrics import FS_SCAN_SECONDS
+
+# inotify 는 선택 사항입니다 (Linux 에서는 requirements.txt 로 설치). 없으면 주기적 rescan 만으로 인덱스를 갱신합니다.
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+logger = logging.getLogger(__name__)
+
+DATE_FOLDER_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+PHOTO_EXTS = {'.jpg', '.jpeg'}
+
+
+def is_photo(filename):
+    return os.path.splitext(filename)[1].lower() in PHOTO_EXTS
+
+
+class IndexNotReady(Exception):
+    """첫 full scan 이 ready_timeout 안에 끝나지 않았습니다."""
+
+
+def scan_photos(directory):
+    """디렉토리의 JPEG 파일 이름을 정렬된 tuple 로 반환합니다."""
+    with os.scandir(directory) as entries:
+        return tuple(sorted(entry.name for entry in entries
+                            if entry.is_file() and is_photo(entry.name)))
+
+
+class ImageIndex:
+    """
+    IMAGES 트리(sites -> dates -> 정렬된 사진 목록)의 메모리 인덱스.
+
+    날짜 폴더의 mtime 이 바뀐 경우에만 다시 나열하므로 rescan 비용은 폴더 수에 비례합니다.
+    inotify_simple 이 설치되어 있으면 최근 날짜 폴더의 변경을 즉시 반영하고,
+    없거나 네트워크 스토리지라 이벤트가 오지 않아도 주기적 rescan 으로 따라잡습니다.
+    """
+
+    # 빠른 rescan 에서 mtime 을 확인할 최근 날짜 수 (오늘, 어제)
+    HOT_DAYS = 2
+
+    def __init__(self, root, ready_timeout=10):
+        self.root = root
+        self.lock = threading.Lock()
+        # rescan / inotify 갱신을 한 번에 하나씩 하여 서로의 변경을 덮어쓰지 않게 합니다 (조회는 lock 만 사용).
+        self.update_lock = threading.Lock()
+        self.ready = threading.Event()
+        self.ready_timeout = ready_timeout
+        # site -> {'setting': bool, 'settings_mtime': settings.txt mtime_ns, 'dates': {date: (mtime_ns, photos)}}
+        self.sites_data = {}
+        self.last_scan = None
+        self.last_full_scan = None
+        self.last_event = None
+        self.inotify = None
+        self.watches = {}
+        self.listeners = []
+
+    # -- 조회 ---------------------------------------------------------------
+
+    def wait_ready(self):
+        """첫 full scan 을 최대 ready_timeout 초 기다립니다. 그래도 끝나지 않았으면 IndexNotReady."""
+        if not self.ready.wait(self.ready_timeout):
+            raise IndexNotReady(f'Image index for {self.root} is still loading')
+
+    def sites(self):
+        self.wait_ready()
+        with self.lock:
+            return sorted(self.sites_data)
+
+    def has_site(self, site):
+        self.wait_ready()
+        with self.lock:
+            return site in self.sites_data
+
+    def has_setting(self, site):
+        self.wait_ready()
+        with self.lock:
+            data = self.sites_data.get(site)
+            return bool(data and data['setting'])
+
+    def settings_mtime(self, site):
+        """setting/settings.txt 의 mtime_ns. 파일이 없으면 None."""
+        self.wait_ready()
+        with self.lock:
+            data = self.sites_data.get(site)
+            return data['settings_mtime'] if data else None
+
+    def dates(self, site):
+        """날짜 폴더 목록 (오름차순)."""
+        self.wait_ready()
+        with self.lock:
+            data = self.sites_data.get(site)
+            return sorted(data['dates']) if data else []
+
+    def date_mtime(self, site, date):
+        """마지막 스캔 때 날짜 폴더의 mtime_ns. 폴더가 없으면 None."""
+        self.wait_ready()
+        with self.lock:
+            data = self.sites_data.get(site)
+            if not data or date not in data['dates']:
+                return None
+            return data['dates'][date][0]
+
+    def photos(self, site, date):
+        """날짜 폴더의 사진 목록 (오름차순). 폴더가 없으면 None."""
+        self.wait_ready()
+        with self.lock:
+            data = self.sites_data.get(site)
+            if not data or date not in data['dates']:
+                return None
+            return data['dates'][date][1]
+
+    def stats(self):
+        self.wait_ready()
+        with self.lock:
+            date_count = sum(len(data['dates']) for data in self.sites_data.values())
+            photo_count = sum(len(photos)
+                              for data in self.sites_data.values()
+                              for _, photos in data['dates'].values())
+        now = time.time()
+        return {
+            'sites': len(self.sites_data),
+            'dates': date_count,
+            'photos': photo_count,
+            'age_seconds': round(now - self.last_scan, 1) if self.last_scan else None,
+            'full_scan_age_seconds': round(now - self.last_full_scan, 1) if self.last_full_scan else None,
+            'last_event_age_seconds': round(now - self.last_event, 1) if self.last_event else None,
+            'inotify': self.inotify is not None,
+            'watches': len(self.watches),
+        }
+
+    # -- 변경 알림 -----------------------------------------------------------
+
+    def add_listener(self, callback):
+        """
+        최근 날짜 폴더에 새 사진이 생기면 callback(site, date, new_photos, photos) 를 호출합니다.
+        inotify / rescan thread 에서 호출되므로 callback 은 오래 걸리지 않아야 합니다.
+        """
+        self.listeners.append(callback)
+
+    def notify_new_photos(self, site, date, old_photos, photos):
+        if not self.listeners or photos is old_photos:
+            return
+        known = set(old_photos)
+        new_photos = [photo for photo in photos if photo not in known]
+        if not new_photos:
+            return
+        for callback in self.listeners:
+            try:
+                callback(site, date, new_photos, photos)
+            except Exception as e:
+                logger.error(f'Image index listener failed for {site}/{date}: {e}')
+
+    def notify_site_changes(self, site, previous, data, hot_dates):
+        previous_dates = previous['dates'] if previous else {}
+        for date in hot_dates & set(data['dates']):
+            self.notify_new_photos(site, date, previous_dates.get(date, (None, ()))[1], data['dates'][date][1])
+
+    # -- 갱신 ---------------------------------------------------------------
+
+    def hot_dates(self):
+        today = datetime.now()
+        return {(today - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(self.HOT_DAYS)}
+
+    def rescan(self, full=False):
+        """
+        인덱스를 파일 시스템과 맞춥니다.
+        full=False 이면 새로 생기거나 없어진 날짜 폴더와 최근 날짜 폴더만 다시 확인합니다.
+        """
+        with self.update_lock:
+            self.rescan_locked(full)
+        self.update_watches()
+
+    def rescan_locked(self, full):
+        started = time.perf_counter()
+        hot_dates = self.hot_dates()
+        try:
+            with os.scandir(self.root) as entries:
+                site_names = [entry.name for entry in entries if entry.is_dir()]
+        except (OSError, TypeError) as e:
+            logger.error(f'Image index rescan failed for {self.root}: {e}')
+            self.ready.set()
+            return
+
+        new_sites_data = {}
+        for site in site_names:
+            previous = self.sites_data.get(site, {'dates': {}})
+            new_sites_data[site] = self.scan_site(site, previous, hot_dates, full)
+
+        with self.lock:
+            previous_sites_data = self.sites_data
+            self.sites_data = new_sites_data
+            self.last_scan = time.time()
+            if full:
+                self.last_full_scan = self.last_scan
+        # 첫 scan 은 알리지 않습니다.
+        if self.ready.is_set():
+            for site, data in new_sites_data.items():
+                self.notify_site_changes(site, previous_sites_data.get(site), data, hot_dates)
+        self.ready.set()
+        FS_SCAN_SECONDS.observe(time.perf_counter() - started,
+                                scan='index_full' if full else 'index_rescan')
+
+    def scan_site(self, site, previous, hot_dates, full):
+        site_path = os.path.join(self.root, site)
+        setting = False
+        dates = {}
+        try:
+            with os.scandir(site_path) as entries:
+                folders = [entry.name for entry in entries if entry.is_dir()]
+        except OSError:
+            return {'setting': False, 'settings_mtime': None, 'dates': {}}
+
+        for folder in folders:
+            if folder == 'setting':
+                setting = True
+                continue
+            if not DATE_FOLDER_PATTERN.fullmatch(folder):
+                continue
+            cached = previous['dates'].get(folder)
+            if cached and not full and folder not in hot_dates:
+                dates[folder] = cached
+                continue
+            dates[folder] = self.scan_date(site, folder, cached)
+        return {'setting': setting,
+                'settings_mtime': self.scan_settings(site) if setting else None,
+                'dates': dates}
+
+    def scan_settings(self, site):
+        try:
+            return os.stat(os.path.join(self.root, site, 'setting', 'settings.txt')).st_mtime_ns
+        except OSError:
+            return None
+
+    def scan_date(self, site, date, cached=None):
+        date_path = os.path.join(self.root, site, date)
+        try:
+            mtime_ns = os.stat(date_path).st_mtime_ns
+            if cached and cached[0] == mtime_ns:
+                return cached
+            return (mtime_ns, scan_photos(date_path))
+        except OSError:
+            return (None, ())
+
+    def refresh_date(self, site, date):
+        """한 날짜 폴더만 다시 나열합니다 (inotify 이벤트 처리용)."""
+        date_path = os.path.join(self.root, site, date)
+        with self.update_lock:
+            with FS_SCAN_SECONDS.time(scan='index_date'):
+                scanned = self.scan_date(site, date) if os.path.isdir(date_path) else None
+            with self.lock:
+                data = self.sites_data.get(site)
+                if data is None:
+                    return
+                previous = data['dates'].get(date, (None, ()))
+                if scanned is None:
+                    data['dates'].pop(date, None)
+                else:
+                    data['dates'][date] = scanned
+            if scanned is not None:
+                self.notify_new_photos(site, date, previous[1], scanned[1])
+
+    def refresh_settings(self, site):
+        """settings.txt 의 mtime 만 다시 확인합니다 (inotify 이벤트 처리용)."""
+        with self.update_lock:
+            settings_mtime = self.scan_settings(site)
+            with self.lock:
+                data = self.sites_data.get(site)
+                if data is not None:
+                    data['settings_mtime'] = settings_mtime
+
+    def refresh_site(self, site):
+        """사이트 폴더를 다시 확인합니다 (새 날짜 폴더 / setting 폴더)."""
+        site_path = os.path.join(self.root, site)
+        with self.update_lock:
+            if not os.path.isdir(site_path):
+                with self.lock:
+                    self.sites_data.pop(site, None)
+            else:
+                previous = self.sites_data.get(site, {'dates': {}})
+                hot_dates = self.hot_dates()
+                with FS_SCAN_SECONDS.time(scan='index_site'):
+                    data = self.scan_site(site, previous, hot_dates, False)
+                with self.lock:
+                    self.sites_data[site] = data
+                self.notify_site_changes(site, previous, data, hot_dates)
+        self.update_watches()
+
+    # -- inotify ------------------------------------------------------------
+
+    def start_inotify(self):
+        if INotify is None:
+            logger.info('inotify_simple not installed, image index uses periodic rescan only')
+            return
+        try:
+            self.inotify = INotify()
+        except OSError as e:
+            logger.warning(f'inotify unavailable, image index uses periodic rescan only: {e}')
+            return
+        self.update_watches()
+        threading.Thread(target=self.watch_loop, name='image-index-inotify', daemon=True).start()
+
+    def watch_paths(self):
+        """root, 사이트 폴더, setting 폴더, 최근 날짜 폴더만 감시하여 watch 수를 사이트 수에 비례하게 유지합니다."""
+        paths = {self.root: (None, None)}
+        hot_dates = self.hot_dates()
+        for site, data in self.sites_data.items():
+            paths[os.path.join(self.root, site)] = (site, None)
+            if data['setting']:
+                paths[os.path.join(self.root, site, 'setting')] = (site, 'setting')
+            for date in hot_dates & set(data['dates']):
+                paths[os.path.join(self.root, site, date)] = (site, date)
+        return paths
+
+    def update_watches(self):
+        if self.inotify is None:
+            return
+        mask = (inotify_flags.CREATE | inotify_flags.DELETE | inotify_flags.MOVED_TO
+                | inotify_flags.MOVED_FROM | inotify_flags.CLOSE_WRITE)
+        with self.lock:
+            wanted = self.watch_paths()
+            current = {path: wd for wd, (path, _) in self.watches.items()}
+            for path, wd in current.items():
+                if path not in wanted:
+                    try:
+                        self.inotify.rm_watch(wd)
+                    except OSError:
+                        pass
+                    self.watches.pop(wd, None)
+            for path, target in wanted.items():
+                if path in current:
+                    continue
+                try:
+                    wd = self.inotify.add_watch(path, mask)
+                except OSError as e:
+                    logger.warning(f'Image index cannot watch {path}: {e}')
+                    continue
+                self.watches[wd] = (path, target)
+
+    def watch_loop(self):
+        while True:
+            try:
+                events = self.inotify.read(read_delay=200)
+            except Exception as e:
+                logger.error(f'Image index inotify read failed: {e}')
+                time.sleep(5)
+                continue
+            touched_sites = set()
+            touched_settings = set()
+            touched_dates = set()
+            rescan_root = False
+            for event in events:
+                watch = self.watches.get(event.wd)
+                if watch is None:
+                    continue
+                site, date = watch[1]
+                if site is None:
+                    rescan_root = True
+                elif date is None:
+                    touched_sites.add(site)
+                elif date == 'setting':
+                    touched_settings.add(site)
+                else:
+                    touched_dates.add((site, date))
+            self.last_event = time.time()
+            if rescan_root:
+                self.rescan()
+                continue
+            for site in touched_sites:
+                self.refresh_site(site)
+            for site in touched_settings - touched_sites:
+                self.refresh_settings(site)
+            for site, date in touched_dates:
+                self.refresh_date(site, date)
+
+    def start(self):
+        """백그라운드에서 첫 full scan 을 하고 inotify 감시를 시작합니다."""
+        def run():
+            self.rescan(full=True)
+            self.start_inotify()
+        threading.Thread(target=run, name='image-index-scan', daemon=True).start()
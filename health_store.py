@@ -0,0 +1,160 @@
+import sqlite3
+import threading
+from datetime import datetime
+
+# 조회 해상도. day bucket 은 서버 현지 시각 자정 기준입니다.
+RESOLUTIONS = ('raw', 'hour', 'day')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS health_raw (
+    site TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    expected INTEGER NOT NULL,
+    actual INTEGER NOT NULL,
+    connected INTEGER,
+    last_frame INTEGER,
+    PRIMARY KEY (site, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS health_raw_ts ON health_raw (ts);
+CREATE TABLE IF NOT EXISTS health_hour (
+    site TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    expected INTEGER NOT NULL,
+    actual INTEGER NOT NULL,
+    connected_samples INTEGER NOT NULL,
+    probe_samples INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    last_frame INTEGER,
+    PRIMARY KEY (site, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS health_day (
+    site TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    expected INTEGER NOT NULL,
+    actual INTEGER NOT NULL,
+    connected_samples INTEGER NOT NULL,
+    probe_samples INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    last_frame INTEGER,
+    PRIMARY KEY (site, ts)
+) WITHOUT ROWID;
+"""
+
+
+def hour_bucket(ts):
+    return ts - ts % 3600
+
+
+def day_bucket(ts):
+    return int(datetime.fromtimestamp(ts).replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+
+
+class HealthStore:
+    """
+    사이트별 촬영 상태(예상/실제 프레임 수, 연결 상태, 마지막 프레임 시각)의 SQLite 시계열 저장소.
+
+    원본 sample 은 raw_retention_days 동안 두고, 기록할 때마다 그 sample 이 속한 시간 bucket 을 raw 에서,
+    일 bucket 을 health_hour 에서 다시 집계합니다 (downsampling). health_day 는 지우지 않습니다.
+    expected / actual 은 하루 누적값이므로 bucket 에서는 최댓값(= bucket 끝의 값)을 씁니다.
+    """
+
+    def __init__(self, path, raw_retention_days=7, hour_retention_days=400):
+        self.path = path
+        self.raw_retention = raw_retention_days * 86400
+        self.hour_retention = hour_retention_days * 86400
+        self.init_lock = threading.Lock()
+        self.initialized = False
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        if not self.initialized:
+            with self.init_lock:
+                if not self.initialized:
+                    connection.execute('PRAGMA journal_mode=WAL')
+                    connection.executescript(SCHEMA)
+                    self.initialized = True
+        return connection
+
+    def record(self, ts, samples):
+        """
+        samples: [{'site', 'expected', 'actual', 'connected' (bool 또는 None), 'last_frame' (epoch 또는 None)}]
+        같은 (site, ts) 는 덮어쓰므로 여러 worker 가 같은 시각에 기록해도 한 번만 남습니다.
+        """
+        hour, day = hour_bucket(ts), day_bucket(ts)
+        rows = [(sample['site'], ts, sample['expected'], sample['actual'],
+                 None if sample['connected'] is None else int(sample['connected']),
+                 sample['last_frame'])
+                for sample in samples]
+        connection = self.connect()
+        try:
+            with connection:
+                connection.executemany(
+                    'INSERT OR REPLACE INTO health_raw VALUES (?, ?, ?, ?, ?, ?)', rows)
+                connection.execute(
+                    'INSERT OR REPLACE INTO health_hour '
+                    'SELECT site, ?, MAX(expected), MAX(actual), '
+                    'COALESCE(SUM(connected), 0), COUNT(connected), COUNT(*), MAX(last_frame) '
+                    'FROM health_raw WHERE ts >= ? AND ts < ? GROUP BY site',
+                    (hour, hour, hour + 3600))
+                # DST 가 있어도 다음 날 자정이 되도록 2시간 여유를 두고 bucket 을 구함
+                connection.execute(
+                    'INSERT OR REPLACE INTO health_day '
+                    'SELECT site, ?, MAX(expected), MAX(actual), '
+                    'SUM(connected_samples), SUM(probe_samples), SUM(samples), MAX(last_frame) '
+                    'FROM health_hour WHERE ts >= ? AND ts < ? GROUP BY site',
+                    (day, day, day_bucket(day + 86400 + 7200)))
+                connection.execute('DELETE FROM health_raw WHERE ts < ?', (ts - self.raw_retention,))
+                connection.execute('DELETE FROM health_hour WHERE ts < ?', (ts - self.hour_retention,))
+        finally:
+            connection.close()
+
+    def query(self, sites, since, until, resolution):
+        """
+        sites 의 [since, until] (epoch 초) 구간 시계열을 사이트별 열(column) 목록으로 반환합니다.
+        {site: {'ts': [...], 'expected': [...], 'actual': [...], 'connected': [...], 'last_frame': [...]}}
+        connected 는 raw 에서는 0/1/None, hour/day 에서는 연결된 sample 비율 (probe 가 없으면 None).
+        """
+        if not sites:
+            return {}
+        placeholders = ','.join('?' * len(sites))
+        if resolution == 'raw':
+            sql = ('SELECT site, ts, expected, actual, connected, last_frame FROM health_raw '
+                   f'WHERE site IN ({placeholders}) AND ts >= ? AND ts <= ? ORDER BY site, ts')
+        else:
+            sql = ('SELECT site, ts, expected, actual, '
+                   'CASE WHEN probe_samples > 0 THEN ROUND(1.0 * connected_samples / probe_samples, 3) END, '
+                   f'last_frame FROM health_{resolution} '
+                   f'WHERE site IN ({placeholders}) AND ts >= ? AND ts <= ? ORDER BY site, ts')
+        series = {}
+        connection = self.connect()
+        try:
+            for site, ts, expected, actual, connected, last_frame in connection.execute(
+                    sql, (*sites, since, until)):
+                columns = series.setdefault(site, {'ts': [], 'expected': [], 'actual': [],
+                                                   'connected': [], 'last_frame': []})
+                columns['ts'].append(ts)
+                columns['expected'].append(expected)
+                columns['actual'].append(actual)
+                columns['connected'].append(connected)
+                columns['last_frame'].append(last_frame)
+        finally:
+            connection.close()
+        return series
+
+    def stats(self):
+        connection = self.connect()
+        try:
+            return {table: connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                    for table in ('health_raw', 'health_hour', 'health_day')}
+        finally:
+            connection.close()
+
+
+def default_resolution(since, until):
+    """구간 길이에 맞춰 응답 크기가 커지지 않는 해상도를 고릅니다."""
+    span = until - since
+    if span <= 2 * 86400:
+        return 'raw'
+    if span <= 62 * 86400:
+        return 'hour'
+    return 'day'
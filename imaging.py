@@ -0,0 +1,163 @@
+import os
+import time
+import tempfile
+from PIL import Image
+
+# 임시 파일은 0600 으로 만들어지므로 교체 전에 일반 파일과 같은 권한(0666 & ~umask)으로 맞춥니다.
+UMASK = os.umask(0)
+os.umask(UMASK)
+FILE_MODE = 0o666 & ~UMASK
+
+# 썸네일/미리보기 JPEG 저장 옵션
+JPEG_SAVE_OPTIONS = {'quality': 85, 'optimize': True, 'progressive': True}
+
+THUMBNAIL_SIZE = (300, 200)
+PREVIEW_SIZE = (1200, 1000)
+
+# /images/<site>/<date>/<photo>?size= 로 제공하는 크기별 사본
+PYRAMID_SIZES = {'small': (480, 360), 'medium': (1200, 1000), 'large': (1920, 1440)}
+
+
+class ImageDecodeError(OSError):
+    """원본을 읽을 수 없습니다 (업로드 중이라 잘린 파일, 이미지가 아닌 파일 등)."""
+
+
+def resize_image(source_path, target, size, draft=True, **save_options):
+    """
+    source_path 이미지를 size 안에 들어가도록 줄여 target(경로 또는 file object)에 JPEG 로 저장합니다.
+    draft=True 이면 JPEG 을 DCT scaling 으로 목표 크기에 가깝게 디코딩하여
+    12~24MP 원본 전체를 메모리에 풀지 않습니다.
+    (decode 초, encode 초) 를 반환합니다.
+    """
+    options = {**JPEG_SAVE_OPTIONS, **save_options}
+    started = time.perf_counter()
+    with Image.open(source_path) as img:
+        if draft and img.format == 'JPEG':
+            img.draft('RGB', size)
+        img.thumbnail(size)
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        decoded = time.perf_counter()
+        img.save(target, 'JPEG', **options)
+    return decoded - started, time.perf_counter() - decoded
+
+
+def write_atomic(target_path, write):
+    """
+    write(file) 로 임시 파일에 저장한 뒤 rename 하여 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 합니다.
+    write 의 반환값을 그대로 반환합니다.
+    """
+    # 동시에 같은 파일을 만드는 요청끼리 임시 파일이 겹치지 않도록 고유한 이름을 사용
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(target_path) or '.',
+                                     suffix='.tmp', delete=False) as tmp_file:
+        tmp_path = tmp_file.name
+        try:
+            result = write(tmp_file)
+        except BaseException:
+            tmp_file.close()
+            os.remove(tmp_path)
+            raise
+    try:
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, target_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return result
+
+
+def resize_image_atomic(source_path, target_path, size, **save_options):
+    """resize_image 를 write_atomic 으로 저장합니다. (decode 초, encode 초) 를 반환합니다."""
+    return write_atomic(target_path,
+                        lambda tmp_file: resize_image(source_path, tmp_file, size, **save_options))
+
+
+def render_thumbnail(source_path, thumbnail_path, thumbnail_size, preview_path=None, preview_size=None):
+    """
+    썸네일과 (preview_path 가 있으면) 미리보기를 만듭니다.
+    process pool worker 에서 실행되므로 경로와 크기는 모두 인자로 받고, PIL 시간을 반환합니다.
+    {'thumbnail': (decode 초, encode 초), 'preview': (decode 초, encode 초)}
+    업로드 중이라 잘린 사진처럼 읽을 수 없으면 예외 대신 {'error': 메시지} 를 반환하여
+    다른 사이트의 작업은 계속되게 합니다.
+    """
+    try:
+        timings = {'thumbnail': resize_image_atomic(source_path, thumbnail_path, thumbnail_size)}
+        if preview_path is not None:
+            os.makedirs(os.path.dirname(preview_path), exist_ok=True)
+            timings['preview'] = resize_image_atomic(source_path, preview_path, preview_size)
+    except OSError as e:
+        return {'error': f'{type(e).__name__}: {e}'}
+    return timings
+
+
+def render_variants(source_path, targets):
+    """
+    targets [(path, size)] 사본을 원본 한 번 디코딩으로 만듭니다.
+    process pool worker 에서도 실행되므로 PIL 시간을 반환합니다. 원본이 지워졌으면 None,
+    읽을 수 없으면 예외 대신 {'error': 메시지} 를 반환합니다.
+    """
+    os.makedirs(os.path.dirname(targets[0][0]), exist_ok=True)
+    try:
+        return resize_image_variants(source_path, targets)
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        return {'error': f'{type(e).__name__}: {e}'}
+
+
+def resize_image_variants(source_path, targets, draft=True, **save_options):
+    """
+    source_path 를 한 번만 디코딩하여 targets [(target_path, size), ...] 의 크기별 JPEG 을 원자적으로 저장합니다.
+    큰 크기부터 차례로 줄이므로 작은 사본은 이미 줄어든 이미지에서 만듭니다.
+    (decode 초, encode 초 합계) 를 반환합니다.
+    """
+    options = {**JPEG_SAVE_OPTIONS, **save_options}
+    targets = sorted(targets, key=lambda target: target[1][0] * target[1][1], reverse=True)
+    started = time.perf_counter()
+    with Image.open(source_path) as img:
+        if draft and img.format == 'JPEG':
+            img.draft('RGB', targets[0][1])
+        img.thumbnail(targets[0][1])
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        decoded = time.perf_counter()
+        for target_path, size in targets:
+            img.thumbnail(size)
+            write_atomic(target_path, lambda tmp_file: img.save(tmp_file, 'JPEG', **options))
+    return decoded - started, time.perf_counter() - decoded
+
+
+def render_sprite_sheet(sources, target_path, tile_size, columns, base_path=None, base_count=0, **save_options):
+    """
+    sources 의 사진들을 tile_size 칸에 줄여 columns 열로 붙인 sprite JPEG 을 원자적으로 저장합니다.
+    base_path 가 있으면 그 sheet 의 앞쪽 base_count 칸은 다시 디코딩하지 않고 그대로 붙여 씁니다.
+    새로 그린 칸의 [x, y, w, h] 목록과 (decode 초, encode 초) 를 반환합니다.
+    """
+    options = {**JPEG_SAVE_OPTIONS, **save_options}
+    tile_width, tile_height = tile_size
+    total = base_count + len(sources)
+    rows = (total + columns - 1) // columns
+    sheet = Image.new('RGB', (tile_width * min(columns, total), tile_height * rows))
+
+    started = time.perf_counter()
+    if base_path:
+        with Image.open(base_path) as base:
+            sheet.paste(base, (0, 0))
+    boxes = []
+    for position, source_path in enumerate(sources, start=base_count):
+        with Image.open(source_path) as img:
+            if img.format == 'JPEG':
+                img.draft('RGB', tile_size)
+            img.thumbnail(tile_size)
+            if img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            x = (position % columns) * tile_width
+            y = (position // columns) * tile_height
+            sheet.paste(img, (x, y))
+            boxes.append([x, y, img.width, img.height])
+    decoded = time.perf_counter()
+    write_atomic(target_path, lambda tmp_file: sheet.save(tmp_file, 'JPEG', **options))
+    return boxes, (decoded - started, time.perf_counter() - decoded)
@@ -0,0 +1,247 @@
+import os
+import re
+import json
+import threading
+from datetime import datetime
+from array import array
+from glob import glob
+
+# 줄 위치 인덱스 캐시: (log_dir, log_type) -> {(st_dev, st_ino): {'size': 읽은 크기, 'ends': 각 '\n' 다음 위치,
+#                                                                 'check': 확인용 앞/끝 bytes}}
+# RotatingFileHandler 는 rename 으로 순환하므로 inode 로 묶으면 info.log -> info.log.1 이 되어도
+# 인덱스를 그대로 재사용할 수 있습니다. inode 는 지운 파일의 번호가 다시 쓰일 수 있으므로
+# 읽은 부분의 앞/끝 bytes 가 같을 때만 같은 파일로 봅니다.
+line_index_cache = {}
+line_index_lock = threading.Lock()
+
+READ_CHUNK = 1 << 20
+CHECK_BYTES = 256
+
+
+def log_file_paths(log_dir, log_type):
+    """최신 파일부터: log/<type>.log, log/<type>.log.1, ..."""
+    base_log_path = os.path.join(log_dir, f'{log_type}.log')
+    rotated_log_paths = sorted(
+        glob(f'{base_log_path}.*'),
+        key=lambda path: int(path.rsplit('.', 1)[1]) if path.rsplit('.', 1)[1].isdigit() else 10**9
+    )
+    return [base_log_path] + rotated_log_paths
+
+
+def index_check(f, size):
+    """인덱스가 같은 파일의 것인지 확인하는 값: 처음 size bytes 중 앞쪽과 끝쪽 CHECK_BYTES."""
+    f.seek(0)
+    head = f.read(min(size, CHECK_BYTES))
+    f.seek(max(0, size - CHECK_BYTES))
+    return head + f.read(min(size, CHECK_BYTES))
+
+
+def line_index(f, stat, cache):
+    """
+    열린 파일 f 의 줄 끝 위치 인덱스를 반환합니다.
+    같은 파일이 커졌으면 새로 추가된 부분만 읽어 인덱스를 늘립니다.
+    """
+    key = (stat.st_dev, stat.st_ino)
+    with line_index_lock:
+        cached = cache.get(key)
+    if cached is not None and (cached['size'] > stat.st_size
+                               or index_check(f, cached['size']) != cached['check']):
+        # 잘렸거나 같은 inode 의 다른 파일
+        cached = None
+    if cached is None:
+        cached = {'size': 0, 'ends': array('q'), 'check': b''}
+    if cached['size'] == stat.st_size:
+        return cached
+
+    # 다른 요청이 읽고 있을 수 있으므로 복사본을 늘려서 교체
+    position = cached['size']
+    ends = array('q', cached['ends'])
+    f.seek(position)
+    while position < stat.st_size:
+        chunk = f.read(min(READ_CHUNK, stat.st_size - position))
+        if not chunk:
+            break
+        offset = chunk.find(b'\n')
+        while offset != -1:
+            ends.append(position + offset + 1)
+            offset = chunk.find(b'\n', offset + 1)
+        position += len(chunk)
+
+    entry = {'size': position, 'ends': ends, 'check': index_check(f, position)}
+    with line_index_lock:
+        cache[key] = entry
+    return entry
+
+
+def line_count(entry):
+    ends = entry['ends']
+    last_end = ends[-1] if ends else 0
+    return len(ends) + (1 if entry['size'] > last_end else 0)
+
+
+def read_lines(f, entry, first, last):
+    """first..last 번째 줄(포함)을 한 번의 seek/read 로 읽어 최신순으로 반환합니다."""
+    ends = entry['ends']
+    start = ends[first - 1] if first > 0 else 0
+    end = ends[last] if last < len(ends) else entry['size']
+    f.seek(start)
+    data = f.read(end - start)
+    lines = data.decode('utf-8', errors='replace').split('\n')
+    if data.endswith(b'\n'):
+        lines.pop()
+    return [line.rstrip('\r') for line in reversed(lines)]
+
+
+def prune_line_index(cache, keys):
+    """순환되어 사라진 파일의 인덱스를 지웁니다."""
+    with line_index_lock:
+        for key in list(cache):
+            if key not in keys:
+                del cache[key]
+
+
+def read_paginated_logs(log_type, page, page_size, log_dir='log'):
+    """
+    최신 로그가 먼저 오도록 <type>.log 와 순환 파일들을 이어 한 페이지를 읽습니다.
+    파일마다 줄 위치 인덱스를 캐시하므로 요청된 페이지의 줄만 seek 해서 읽고,
+    total 은 인덱스의 줄 수 합으로 계산합니다.
+    """
+    start = (page - 1) * page_size
+    end = start + page_size
+    log_lines = []
+    total = 0
+    seen_keys = set()
+    with line_index_lock:
+        cache = line_index_cache.setdefault((log_dir, log_type), {})
+
+    for path in log_file_paths(log_dir, log_type):
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            continue
+        with f:
+            stat = os.fstat(f.fileno())
+            seen_keys.add((stat.st_dev, stat.st_ino))
+            entry = line_index(f, stat, cache)
+            count = line_count(entry)
+
+            # 이 파일이 맡은 전체 순서상의 구간 [total, total + count) 과 페이지의 겹치는 부분
+            page_first = max(start, total)
+            page_last = min(end, total + count) - 1
+            if page_first <= page_last:
+                # 파일 안에서는 마지막 줄이 가장 최신
+                newest = count - 1 - (page_first - total)
+                oldest = count - 1 - (page_last - total)
+                log_lines.extend(read_lines(f, entry, oldest, newest))
+            total += count
+
+    prune_line_index(cache, seen_keys)
+    total_pages = (total + page_size - 1) // page_size if total > 0 else 0
+
+    return {
+        "logs": log_lines,
+        "total": total,
+        "total_pages": total_pages
+    }
+
+
+# -- 필터 검색 --------------------------------------------------------------
+
+# 텍스트 형식: '%(asctime)s %(levelname)s: %(message)s'
+TEXT_LOG_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d+ (\w+): (.*)')
+LOG_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40, 'CRITICAL': 50}
+BLOCK_LINES = 1000
+
+
+def iter_lines_newest_first(log_type, log_dir='log'):
+    """최신 줄부터 BLOCK_LINES 단위로 뒤에서부터 읽어 하나씩 돌려줍니다."""
+    with line_index_lock:
+        cache = line_index_cache.setdefault((log_dir, log_type), {})
+    for path in log_file_paths(log_dir, log_type):
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            continue
+        with f:
+            entry = line_index(f, os.fstat(f.fileno()), cache)
+            last = line_count(entry) - 1
+            while last >= 0:
+                first = max(0, last - BLOCK_LINES + 1)
+                yield from read_lines(f, entry, first, last)
+                last = first - 1
+
+
+def parse_log_line(line):
+    """JSON 형식과 텍스트 형식 로그 한 줄을 모두 dict 로 바꿉니다. 시간을 읽지 못하면 time=None."""
+    if line.startswith('{'):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if isinstance(record, dict):
+            try:
+                record['time'] = datetime.strptime(record.get('time', '')[:19], LOG_TIME_FORMAT)
+            except (TypeError, ValueError):
+                record['time'] = None
+            return record
+
+    match = TEXT_LOG_PATTERN.match(line)
+    if not match:
+        # traceback 처럼 이어지는 줄
+        return {'time': None, 'level': None, 'message': line}
+    return {'time': datetime.strptime(match.group(1), LOG_TIME_FORMAT),
+            'level': match.group(2),
+            'message': match.group(3)}
+
+
+def log_matches(record, line, filters):
+    level = filters.get('level')
+    if level and LEVELS.get(record.get('level'), -1) < LEVELS[level]:
+        return False
+    for field in ('event', 'site', 'username'):
+        if filters.get(field) and record.get(field) != filters[field]:
+            return False
+    if filters.get('since') and (record['time'] is None or record['time'] < filters['since']):
+        return False
+    if filters.get('until') and (record['time'] is None or record['time'] > filters['until']):
+        return False
+    if filters.get('q') and filters['q'].lower() not in line.lower():
+        return False
+    return True
+
+
+def read_filtered_logs(log_type, page, page_size, filters, log_dir='log'):
+    """
+    최신순으로 한 줄씩 filters 를 적용하며 읽다가 페이지가 차면 멈춥니다.
+    since 보다 오래된 줄이 나오면 그 뒤는 모두 더 오래되었으므로 바로 멈춥니다.
+    전체 개수는 세지 않고 다음 페이지가 있는지만 has_more 로 알려줍니다.
+
+    filters: level(이상), event, site, username, since/until(datetime), q(대소문자 무시 부분 문자열)
+    """
+    skip = (page - 1) * page_size
+    log_lines = []
+    has_more = False
+
+    lines = iter_lines_newest_first(log_type, log_dir)
+    try:
+        for line in lines:
+            record = parse_log_line(line)
+            if filters.get('since') and record['time'] is not None and record['time'] < filters['since']:
+                break
+            if not log_matches(record, line, filters):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            if len(log_lines) == page_size:
+                has_more = True
+                break
+            log_lines.append(line)
+    finally:
+        lines.close()
+
+    return {
+        "logs": log_lines,
+        "has_more": has_more
+    }
@@ -0,0 +1,191 @@
+"""
+Prometheus text 형식(0.0.4)으로 내보내는 간단한 메트릭 모듈.
+
+prometheus_client 없이 Counter / Gauge / Histogram 만 구현합니다.
+값은 프로세스 메모리에 있으므로 worker 가 여러 개면 /metrics 는 응답한 worker 의 값입니다.
+"""
+import math
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# 기본 histogram 구간 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+registry = []
+registry_lock = threading.Lock()
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in pairs) + '}'
+
+
+class Metric:
+    TYPE = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+        with registry_lock:
+            registry.append(self)
+
+    def label_key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def remove(self, **labels):
+        with self.lock:
+            self.values.pop(self.label_key(labels), None)
+
+    def clear(self, **labels):
+        """주어진 label 값을 가진 모든 series 를 지웁니다 (label 을 주지 않으면 전부)."""
+        positions = [(self.labelnames.index(name), str(value)) for name, value in labels.items()]
+        with self.lock:
+            for key in list(self.values):
+                if all(key[i] == value for i, value in positions):
+                    del self.values[key]
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.TYPE}']
+        with self.lock:
+            items = sorted(self.values.items())
+            lines.extend(self.render_samples(items))
+        return lines
+
+    def render_samples(self, items):
+        return [f'{self.name}{format_labels(self.labelnames, key)} {format_value(value)}'
+                for key, value in items]
+
+
+class Counter(Metric):
+    TYPE = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.label_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    TYPE = 'gauge'
+
+    def set(self, value, **labels):
+        key = self.label_key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self.label_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    TYPE = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self.label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                # 구간별 개수 (누적 아님), 합계
+                state = self.values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0}
+            state['counts'][index] += 1
+            state['sum'] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render_samples(self, items):
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['counts']):
+                cumulative += count
+                labels = format_labels(self.labelnames, key, ('le', format_value(float(bound))))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {format_value(state["sum"])}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+def render_metrics():
+    """등록된 모든 메트릭을 Prometheus text 형식 문자열로 만듭니다."""
+    with registry_lock:
+        metrics = list(registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+# -- 공용 메트릭 ------------------------------------------------------------
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'bmwebm_http_request_duration_seconds', 'HTTP request latency by route.',
+    ('route', 'method', 'status'))
+
+JOB_SECONDS = Histogram(
+    'bmwebm_job_duration_seconds', 'Scheduler job run time.', ('job',))
+JOB_OVERRUNS = Counter(
+    'bmwebm_job_overruns_total',
+    'Job runs that took longer than their schedule interval or overlapped a previous run.',
+    ('job', 'reason'))
+JOB_RUNNING = Gauge(
+    'bmwebm_job_running', 'Scheduler job instances currently running.', ('job',))
+SITE_JOB_SECONDS = Gauge(
+    'bmwebm_site_job_last_duration_seconds',
+    'Time spent on one site in the last run of a scheduler job.', ('job', 'site'))
+
+IMAGE_SECONDS = Histogram(
+    'bmwebm_image_seconds', 'PIL decode/encode time.', ('kind', 'phase'))
+
+MONGO_SECONDS = Histogram(
+    'bmwebm_mongo_call_duration_seconds', 'MongoDB call latency.', ('collection', 'operation'))
+
+FS_SCAN_SECONDS = Histogram(
+    'bmwebm_fs_scan_duration_seconds', 'Filesystem scan time.', ('scan',))
+
+SSE_SUBSCRIBERS = Gauge(
+    'bmwebm_sse_subscribers', 'Open Server-Sent Events connections.')
+SSE_EVENTS = Counter(
+    'bmwebm_sse_events_total', 'Site events published to subscribers.', ('event',))
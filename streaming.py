@@ -0,0 +1,68 @@
+import os
+import zipfile
+
+# 파일을 읽어 보내는 단위
+CHUNK_SIZE = 256 * 1024
+
+
+class StreamBuffer:
+    """
+    ZipFile 이 쓰는 내용을 모아 두었다가 generator 가 꺼내 보내는 write-only stream.
+    seek/tell 이 없으므로 ZipFile 은 각 항목 뒤에 data descriptor 를 붙여 앞으로만 씁니다.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(files):
+    """
+    files [(arcname, path), ...] 를 압축하지 않은(ZIP_STORED) ZIP 으로 조금씩 만들어 bytes 를 돌려줍니다.
+    전체 archive 를 메모리에 두지 않으며, 그 사이 지워진 파일은 건너뜁니다.
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for arcname, path in files:
+            try:
+                info = zipfile.ZipInfo.from_file(path, arcname)
+                f = open(path, 'rb')
+            except FileNotFoundError:
+                continue
+            with f, archive.open(info, 'w') as entry:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    entry.write(chunk)
+                    yield buffer.drain()
+            yield buffer.drain()
+    # central directory
+    yield buffer.drain()
+
+
+def stream_multipart(files, boundary, content_type='image/jpeg'):
+    """files [(filename, path), ...] 를 multipart/mixed 본문으로 조금씩 돌려줍니다. 지워진 파일은 건너뜁니다."""
+    for filename, path in files:
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            continue
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            yield (f'--{boundary}\r\n'
+                   f'Content-Type: {content_type}\r\n'
+                   f'Content-Disposition: attachment; filename="{filename}"\r\n'
+                   f'Content-Length: {size}\r\n\r\n').encode()
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                yield chunk
+            yield b'\r\n'
+    yield f'--{boundary}--\r\n'.encode()
@@ -0,0 +1,167 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import log_reader
+from log_reader import line_count, line_index, read_filtered_logs, read_lines, read_paginated_logs
+
+
+def log_line(number, level='INFO', start=datetime(2024, 1, 1)):
+    time = (start + timedelta(minutes=number)).strftime('%Y-%m-%d %H:%M:%S')
+    return f'{time},000 {level}: line {number}'
+
+
+class LogReaderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_dir = self.tmp.name
+        log_reader.line_index_cache.clear()
+
+    def tearDown(self):
+        log_reader.line_index_cache.clear()
+        self.tmp.cleanup()
+
+    def write_log(self, name, lines, mode='w', trailing_newline=True):
+        with open(os.path.join(self.log_dir, name), mode) as f:
+            f.write('\n'.join(lines) + ('\n' if trailing_newline and lines else ''))
+
+    def write_rotated(self, total, per_file):
+        """info.log.N(가장 오래됨) ... info.log(최신) 순으로 line 0..total-1 을 나눠 씁니다."""
+        chunks = [list(range(start, min(start + per_file, total))) for start in range(0, total, per_file)]
+        for age, chunk in enumerate(reversed(chunks)):
+            name = 'info.log' if age == 0 else f'info.log.{age}'
+            self.write_log(name, [log_line(number) for number in chunk])
+
+    def newest_first(self, numbers):
+        return [log_line(number) for number in sorted(numbers, reverse=True)]
+
+
+class LineIndexTest(LogReaderTestCase):
+    def index(self, name, cache):
+        with open(os.path.join(self.log_dir, name), 'rb') as f:
+            return line_index(f, os.fstat(f.fileno()), cache)
+
+    def test_counts_lines_with_and_without_trailing_newline(self):
+        self.write_log('a.log', ['x', 'y', 'z'])
+        self.write_log('b.log', ['x', 'y', 'z'], trailing_newline=False)
+        self.assertEqual(line_count(self.index('a.log', {})), 3)
+        self.assertEqual(line_count(self.index('b.log', {})), 3)
+
+    def test_empty_file(self):
+        self.write_log('a.log', [])
+        self.assertEqual(line_count(self.index('a.log', {})), 0)
+
+    def test_extends_index_for_appended_lines(self):
+        cache = {}
+        self.write_log('a.log', ['x', 'y'])
+        first = self.index('a.log', cache)
+        self.write_log('a.log', ['z'], mode='a')
+        entry = self.index('a.log', cache)
+        self.assertEqual(line_count(entry), 3)
+        self.assertEqual(list(entry['ends'][:2]), list(first['ends']))
+
+    def test_partial_last_line_is_completed_after_append(self):
+        cache = {}
+        self.write_log('a.log', ['x', 'part'], trailing_newline=False)
+        self.index('a.log', cache)
+        self.write_log('a.log', ['ial', 'next'], mode='a')
+        entry = self.index('a.log', cache)
+        with open(os.path.join(self.log_dir, 'a.log'), 'rb') as f:
+            self.assertEqual(read_lines(f, entry, 0, line_count(entry) - 1), ['next', 'partial', 'x'])
+
+    def test_rebuilds_index_when_inode_holds_another_file(self):
+        cache = {}
+        self.write_log('a.log', [f'old {number}' for number in range(10)])
+        self.index('a.log', cache)
+        # 같은 inode 에 더 큰 다른 내용 (지운 파일의 inode 가 다시 쓰인 경우와 같음)
+        self.write_log('a.log', [f'new line {number:03d}' for number in range(30)])
+        entry = self.index('a.log', cache)
+        self.assertEqual(line_count(entry), 30)
+        with open(os.path.join(self.log_dir, 'a.log'), 'rb') as f:
+            self.assertEqual(read_lines(f, entry, 14, 15), ['new line 015', 'new line 014'])
+
+    def test_rebuilds_index_when_file_shrinks(self):
+        cache = {}
+        self.write_log('a.log', ['x'] * 10)
+        self.index('a.log', cache)
+        self.write_log('a.log', ['y', 'z'])
+        self.assertEqual(line_count(self.index('a.log', cache)), 2)
+
+    def test_read_lines_returns_newest_first(self):
+        self.write_log('a.log', ['l0', 'l1', 'l2', 'l3\r'])
+        entry = self.index('a.log', {})
+        with open(os.path.join(self.log_dir, 'a.log'), 'rb') as f:
+            self.assertEqual(read_lines(f, entry, 1, 3), ['l3', 'l2', 'l1'])
+            self.assertEqual(read_lines(f, entry, 0, 0), ['l0'])
+
+
+class ReadPaginatedLogsTest(LogReaderTestCase):
+    def test_pages_across_rotated_files(self):
+        self.write_rotated(25, per_file=10)
+        expected = self.newest_first(range(25))
+        for page_size in (1, 3, 7, 10, 25, 40):
+            collected = []
+            page = 1
+            while True:
+                result = read_paginated_logs('info', page, page_size, log_dir=self.log_dir)
+                self.assertEqual(result['total'], 25)
+                self.assertEqual(result['total_pages'], (25 + page_size - 1) // page_size)
+                if not result['logs']:
+                    break
+                collected.extend(result['logs'])
+                page += 1
+            self.assertEqual(collected, expected, page_size)
+
+    def test_middle_page(self):
+        self.write_rotated(30, per_file=10)
+        result = read_paginated_logs('info', 2, 8, log_dir=self.log_dir)
+        self.assertEqual(result['logs'], self.newest_first(range(14, 22)))
+
+    def test_sees_appended_and_rotated_lines(self):
+        self.write_rotated(10, per_file=10)
+        read_paginated_logs('info', 1, 5, log_dir=self.log_dir)
+        os.rename(os.path.join(self.log_dir, 'info.log'), os.path.join(self.log_dir, 'info.log.1'))
+        self.write_log('info.log', [log_line(number) for number in range(10, 13)])
+        result = read_paginated_logs('info', 1, 5, log_dir=self.log_dir)
+        self.assertEqual(result['total'], 13)
+        self.assertEqual(result['logs'], self.newest_first(range(8, 13)))
+
+    def test_no_log_files(self):
+        self.assertEqual(read_paginated_logs('info', 1, 10, log_dir=self.log_dir),
+                         {'logs': [], 'total': 0, 'total_pages': 0})
+
+
+class ReadFilteredLogsTest(LogReaderTestCase):
+    def test_level_filter_and_paging(self):
+        levels = ['INFO', 'WARNING', 'ERROR']
+        self.write_log('info.log', [log_line(number, levels[number % 3]) for number in range(30)])
+        expected = [log_line(number, levels[number % 3]) for number in range(29, -1, -1) if number % 3]
+        first = read_filtered_logs('info', 1, 15, {'level': 'WARNING'}, log_dir=self.log_dir)
+        second = read_filtered_logs('info', 2, 15, {'level': 'WARNING'}, log_dir=self.log_dir)
+        self.assertEqual(first, {'logs': expected[:15], 'has_more': True})
+        self.assertEqual(second, {'logs': expected[15:], 'has_more': False})
+
+    def test_reads_across_blocks_and_files(self):
+        self.write_rotated(25, per_file=10)
+        with mock.patch.object(log_reader, 'BLOCK_LINES', 4):
+            result = read_filtered_logs('info', 1, 100, {'q': 'LINE'}, log_dir=self.log_dir)
+        self.assertEqual(result, {'logs': self.newest_first(range(25)), 'has_more': False})
+
+    def test_since_and_until(self):
+        self.write_rotated(25, per_file=10)
+        filters = {'since': datetime(2024, 1, 1, 0, 5), 'until': datetime(2024, 1, 1, 0, 12)}
+        result = read_filtered_logs('info', 1, 100, filters, log_dir=self.log_dir)
+        self.assertEqual(result['logs'], self.newest_first(range(5, 13)))
+
+    def test_json_lines(self):
+        self.write_log('info.log', ['{"time": "2024-01-01 00:00:00", "level": "INFO", "event": "a", "message": "x"}',
+                                    '{"time": "2024-01-01 00:01:00", "level": "INFO", "event": "b", "message": "y"}'])
+        result = read_filtered_logs('info', 1, 10, {'event': 'a'}, log_dir=self.log_dir)
+        self.assertEqual(len(result['logs']), 1)
+        self.assertIn('"event": "a"', result['logs'][0])
+
+
+if __name__ == '__main__':
+    unittest.main()